@@ -0,0 +1,204 @@
+"""Structure every transcript in a directory into question files, resumably.
+
+Transcripts (downloaded .json or plain .txt) are structured a few at a time,
+with Bedrock calls bounded and retried with exponential backoff by
+TranscriptStructurer. After each transcript its question files are written and
+a checkpoint manifest in the output directory records the transcript hash and
+structurer settings it was built with, so an interrupted run picks up where it
+stopped and unchanged transcripts are skipped on later runs.
+
+    python -m backend.batch_structure --workers 4 --max-concurrency 8
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from backend.structured_data import MODEL_ID, SECTIONS, TranscriptStructurer
+
+MANIFEST_NAME = "structure_manifest.json"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def structurer_signature(structurer: TranscriptStructurer) -> str:
+    """Hash of everything besides the transcript that shapes the question files."""
+    settings = [structurer.model_id, structurer.prompts, list(SECTIONS),
+                structurer.chunk_tokens, structurer.chunk_overlap]
+    return _text_hash(json.dumps(settings, sort_keys=True, ensure_ascii=False))
+
+
+class StructureManifest:
+    def __init__(self, output_dir: str):
+        """Checkpoint of structured transcripts: {key: {hash, signature, sections, seconds}}."""
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading structure manifest: {str(e)}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.entries.get(key)
+
+    def record(self, key: str, entry: Dict):
+        """Add an entry and write the manifest atomically."""
+        with self._lock:
+            self.entries[key] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def _question_file(output_dir: str, key: str, section_num: int) -> str:
+    return os.path.join(output_dir, f"{key}_section{section_num}.txt")
+
+
+def _existing_sections(output_dir: str, key: str) -> List[int]:
+    return [section_num for section_num in SECTIONS if os.path.exists(_question_file(output_dir, key, section_num))]
+
+
+def _is_up_to_date(manifest: StructureManifest, key: str, digest: str, signature: str,
+                   output_dir: str, source_mtime: float) -> bool:
+    """True when the question files were built from this transcript with these settings."""
+    entry = manifest.get(key)
+    if entry:
+        # Sections without questions have no file, so only the recorded ones must exist
+        return (entry['hash'] == digest and entry['signature'] == signature and
+                all(os.path.exists(_question_file(output_dir, key, n)) for n in entry['sections']))
+    # Files from before the manifest existed count as current if they are newer
+    sections = _existing_sections(output_dir, key)
+    return bool(sections) and all(
+        os.path.getmtime(_question_file(output_dir, key, n)) >= source_mtime for n in sections
+    )
+
+
+def _remove_stale_sections(output_dir: str, key: str, sections: Dict[int, str]):
+    """Delete question files of sections the latest run no longer produced."""
+    for section_num in SECTIONS:
+        if section_num not in sections:
+            try:
+                os.remove(_question_file(output_dir, key, section_num))
+            except FileNotFoundError:
+                pass
+
+
+def structure_directory(data_dir: str = "backend/data/transcripts", output_dir: str = "backend/data/questions",
+                        structurer: Optional[TranscriptStructurer] = None, workers: int = 4,
+                        force: bool = False) -> Dict:
+    """Structure every new or changed transcript in data_dir.
+
+    Args:
+        data_dir (str): Directory of .json (downloaded) or .txt transcripts
+        output_dir (str): Where <key>_sectionN.txt files and the manifest go
+        structurer (TranscriptStructurer): Structurer to use, defaults to one on Bedrock
+        workers (int): Transcripts structured at the same time; Bedrock calls are
+            further bounded by the structurer's max_concurrency
+        force (bool): Structure every transcript even if its files are up to date
+
+    Returns:
+        Dict: Counts of structured, skipped and failed transcripts, timings,
+            Bedrock retries, cache statistics and the error messages
+    """
+    structurer = structurer or TranscriptStructurer()
+    signature = structurer_signature(structurer)
+    manifest = StructureManifest(output_dir)
+
+    pending: List[Tuple[str, str, str]] = []
+    skipped = 0
+    for filename in sorted(os.listdir(data_dir)):
+        key, ext = os.path.splitext(filename)
+        if ext not in ('.json', '.txt'):
+            continue
+        path = os.path.join(data_dir, filename)
+        text = structurer.load_transcript(path)
+        if not text:
+            continue
+        digest = _text_hash(text)
+        if not force and _is_up_to_date(manifest, key, digest, signature, output_dir, os.path.getmtime(path)):
+            if not manifest.get(key):
+                manifest.record(key, {'hash': digest, 'signature': signature,
+                                      'sections': _existing_sections(output_dir, key)})
+            skipped += 1
+            continue
+        pending.append((key, text, digest))
+    print(f"{len(pending)} transcripts to structure, {skipped} up to date")
+
+    def structure(key: str, text: str, digest: str) -> float:
+        start = time.perf_counter()
+        sections = structurer.structure_transcript(text, raise_on_error=True)
+        if not structurer.save_questions(sections, os.path.join(output_dir, f"{key}.txt")):
+            raise RuntimeError("Could not save question files")
+        _remove_stale_sections(output_dir, key, sections)
+        seconds = time.perf_counter() - start
+        manifest.record(key, {'hash': digest, 'signature': signature, 'sections': sorted(sections),
+                              'seconds': round(seconds, 3)})
+        return seconds
+
+    structured = 0
+    errors = []
+    retries_before = structurer.retry_count
+    start = time.perf_counter()
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(structure, key, text, digest): key for key, text, digest in pending}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    seconds = future.result()
+                    structured += 1
+                    print(f"Structured {key} in {seconds:.1f}s ({structured}/{len(pending)})")
+                except Exception as e:
+                    errors.append(f"{key}: {str(e)}")
+                    print(f"Error structuring {key}: {str(e)}")
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'structured': structured,
+        'skipped': skipped,
+        'failed': len(errors),
+        'seconds': elapsed,
+        'transcripts_per_minute': structured / elapsed * 60 if elapsed else 0.0,
+        'retries': structurer.retry_count - retries_before,
+        'cache': structurer.response_cache.stats(),
+        'errors': errors
+    }
+    print(f"\nStructured {structured}, skipped {skipped}, failed {len(errors)} in {elapsed:.1f}s "
+          f"({stats['transcripts_per_minute']:.1f} transcripts/min, {stats['retries']} retries, "
+          f"response cache hit rate {stats['cache']['hit_rate']:.0%})")
+    for message in errors:
+        print(f"  {message}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default="backend/data/transcripts")
+    parser.add_argument('--output-dir', default="backend/data/questions")
+    parser.add_argument('--model-id', default=MODEL_ID)
+    parser.add_argument('--workers', type=int, default=4, help="Transcripts structured at the same time")
+    parser.add_argument('--max-concurrency', type=int, default=8, help="Bedrock calls in flight at once")
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the Bedrock response cache")
+    parser.add_argument('--force', action='store_true', help="Re-structure transcripts that are up to date")
+    args = parser.parse_args()
+
+    structurer = TranscriptStructurer(args.model_id, max_concurrency=args.max_concurrency,
+                                      max_retries=args.retries, use_cache=not args.no_cache)
+    stats = structure_directory(args.data_dir, args.output_dir, structurer, args.workers, args.force)
+    if stats['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Bulk-embed a transcript archive into the RAG index cache with a process pool.
+
+Transcripts are split into shards of --shard-size files. Each worker process loads
+the sentence transformer once, embeds whole shards and writes the per-transcript
+segment and vector files straight into the index cache; the parent merges each
+finished shard into the cache manifest and saves it, so an interrupted run
+resumes after the last completed shard. RAGSystem then builds its index from the
+cache without encoding anything. Run it while the app is stopped, since the app
+writes the same manifest.
+
+    python -m backend.bulk_ingest --data-dir backend/data/transcripts --workers 4
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from backend.chunker import segmenter_name, transcript_segments
+from backend.index_cache import IndexCache, content_hash
+from backend.index_factory import INDEX_TYPES, IndexConfig
+from backend.rag_system import RAGSystem
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Per-process state, set up once by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(model_name: str, cache_dir: str, embedding_size: int, chunk_tokens: Optional[int],
+                 chunk_overlap: int, batch_size: int, threads: int):
+    # Imported in the worker so only spawned processes load torch and the model, never the parent
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _worker['model'] = SentenceTransformer(model_name)
+    _worker['cache'] = IndexCache(cache_dir, model_name, embedding_size, segmenter_name(chunk_tokens, chunk_overlap))
+    _worker['chunking'] = (chunk_tokens, chunk_overlap)
+    _worker['batch_size'] = batch_size
+
+
+def _embed_shard(shard: int, files: List[Tuple[str, str, Optional[Dict]]]) -> Tuple[int, Dict[str, Dict], int, List[str]]:
+    """Embed one shard in a worker process.
+
+    Args:
+        shard (int): Shard number, passed back for progress reporting
+        files (List[Tuple]): (key, path, current manifest entry or None) per transcript
+
+    Returns:
+        Tuple: (shard, manifest entries to merge, segments embedded, error messages)
+    """
+    cache = _worker['cache']
+    chunk_tokens, chunk_overlap = _worker['chunking']
+    entries = {}
+    embedded = 0
+    errors = []
+    for key, path, entry in files:
+        try:
+            stat = os.stat(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            digest = content_hash(data)
+            if entry and entry['hash'] == digest:
+                # Only the mtime changed
+                entries[key] = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                continue
+
+            segments = transcript_segments(data, chunk_tokens, chunk_overlap)
+            texts = [s['text'] for s in segments]
+            if texts:
+                vectors = np.asarray(_worker['model'].encode(texts, batch_size=_worker['batch_size']), dtype='float32')
+            else:
+                vectors = np.zeros((0, cache.embedding_size), dtype='float32')
+            cache.put(key, digest, segments, vectors, stat)
+            entries[key] = cache.entry(key)
+            embedded += len(segments)
+        except Exception as e:
+            errors.append(f"{os.path.basename(path)}: {str(e)}")
+    return shard, entries, embedded, errors
+
+
+def bulk_ingest(data_dir: str = "backend/data/transcripts", cache_dir: Optional[str] = None,
+                model_name: str = DEFAULT_MODEL, embedding_size: int = 384,
+                chunk_tokens: Optional[int] = 128, chunk_overlap: int = 32, workers: Optional[int] = None,
+                shard_size: int = 64, batch_size: int = 64, index_config: Optional[IndexConfig] = None,
+                build_index: bool = True) -> Dict:
+    """Embed every new or changed transcript in data_dir into the index cache.
+
+    Args:
+        data_dir (str): Directory containing transcript files
+        cache_dir (str): Index cache directory, defaults to the one RAGSystem uses
+        model_name (str): Sentence transformer to embed with (must match the app's)
+        embedding_size (int): Size of embeddings from the model
+        chunk_tokens (int): Chunk token budget, as for RAGSystem
+        chunk_overlap (int): Chunk overlap, as for RAGSystem
+        workers (int): Worker processes, defaults to the number of CPUs
+        shard_size (int): Transcripts per shard; a crash loses at most one shard per worker
+        batch_size (int): Encoder batch size inside a worker
+        index_config (IndexConfig): Index to build from the merged cache
+        build_index (bool): Build and snapshot the FAISS index once all shards are done
+
+    Returns:
+        Dict: transcripts, skipped, segments, errors, seconds and segments_per_second
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.normpath(data_dir)), "rag_cache")
+    cache = IndexCache(cache_dir, model_name, embedding_size, segmenter_name(chunk_tokens, chunk_overlap))
+    workers = workers or os.cpu_count() or 1
+
+    pending = []
+    skipped = 0
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.endswith('.json'):
+            key = os.path.splitext(filename)[0]
+            path = os.path.join(data_dir, filename)
+            if cache.is_removed(key):
+                # Taken out with RAGSystem.remove_video(); the app would skip it too
+                continue
+            if cache.is_fresh(key, os.stat(path)):
+                skipped += 1
+            else:
+                pending.append((key, path, cache.entry(key)))
+    shards = [pending[i:i + shard_size] for i in range(0, len(pending), shard_size)]
+    print(f"{len(pending)} transcripts to embed in {len(shards)} shards, {skipped} already cached")
+
+    embedded = 0
+    errors = []
+    start = time.perf_counter()
+    if shards:
+        workers = min(workers, len(shards))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # Spawned workers do not inherit the parent's torch/OpenMP thread pools
+        context = multiprocessing.get_context('spawn')
+        initargs = (model_name, cache_dir, embedding_size, chunk_tokens, chunk_overlap, batch_size, threads)
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_embed_shard, i, shard) for i, shard in enumerate(shards)]
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    shard, entries, count, shard_errors = future.result()
+                except Exception as e:
+                    print(f"Error embedding shard: {str(e)}")
+                    errors.append(str(e))
+                    continue
+                cache.merge(entries)
+                cache.save_manifest()
+                embedded += count
+                errors.extend(shard_errors)
+                for message in shard_errors:
+                    print(f"Error embedding transcript {message}")
+                elapsed = time.perf_counter() - start
+                print(f"Shard {shard + 1} done ({done}/{len(shards)}): {count} segments, "
+                      f"{embedded / elapsed:.1f} segments/s overall")
+
+    seconds = time.perf_counter() - start
+    stats = {
+        'transcripts': len(pending),
+        'skipped': skipped,
+        'segments': embedded,
+        'errors': len(errors),
+        'seconds': seconds,
+        'segments_per_second': embedded / seconds if seconds else 0.0
+    }
+    print(f"Embedded {embedded} segments in {seconds:.1f}s ({stats['segments_per_second']:.1f} segments/s), "
+          f"{len(errors)} errors")
+
+    if build_index:
+        # Every transcript is fresh in the cache now, so this only merges vectors
+        RAGSystem(data_dir=data_dir, model_name=model_name, cache_dir=cache_dir, embedding_size=embedding_size,
+                  index_config=index_config, retrieval_only=True, chunk_tokens=chunk_tokens,
+                  chunk_overlap=chunk_overlap)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default="backend/data/transcripts")
+    parser.add_argument('--cache-dir', default=None, help="Defaults to rag_cache next to the data directory")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--embedding-size', type=int, default=384)
+    parser.add_argument('--chunk-tokens', type=int, default=128, help="0 indexes raw caption lines")
+    parser.add_argument('--chunk-overlap', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='flat')
+    parser.add_argument('--no-index', action='store_true', help="Only fill the cache")
+    args = parser.parse_args()
+
+    bulk_ingest(args.data_dir, args.cache_dir, args.model, args.embedding_size, args.chunk_tokens or None,
+                args.chunk_overlap, args.workers, args.shard_size, args.batch_size,
+                IndexConfig(args.index_type), not args.no_index)
+
+
+if __name__ == "__main__":
+    main()
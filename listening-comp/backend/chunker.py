@@ -0,0 +1,156 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+# Multilingual SentencePiece models split Persian words into about 1.5 pieces on
+# average; overestimating keeps chunks inside the model window
+TOKENS_PER_WORD = 1.5
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap token estimate that does not need a tokenizer."""
+    return math.ceil(len(text.split()) * TOKENS_PER_WORD)
+
+
+def token_windows(items: List, sizes: List[int], max_tokens: int, overlap_tokens: int) -> List[List]:
+    """Group items into consecutive windows that fit a token budget.
+
+    Each window starts with the trailing items of the previous window, up to
+    overlap_tokens, as long as the next item still fits. A single item larger
+    than max_tokens becomes its own window.
+
+    Args:
+        items (List): Items in order
+        sizes (List[int]): Token count of each item
+        max_tokens (int): Token budget per window
+        overlap_tokens (int): Tokens carried over from the previous window
+
+    Returns:
+        List[List]: Windows of items, in order
+    """
+    windows = []
+    window = []
+    window_sizes = []
+
+    for item, size in zip(items, sizes):
+        if window and sum(window_sizes) + size > max_tokens:
+            windows.append(window)
+
+            # Carry the tail of the window over, as long as the new item still fits
+            keep = 0
+            carried = 0
+            for previous in reversed(window_sizes):
+                if carried + previous > overlap_tokens or carried + previous + size > max_tokens:
+                    break
+                carried += previous
+                keep += 1
+            window = window[len(window) - keep:]
+            window_sizes = window_sizes[len(window_sizes) - keep:]
+
+        window.append(item)
+        window_sizes.append(size)
+
+    if window:
+        windows.append(window)
+    return windows
+
+
+def _merge(window: List[Dict]) -> Dict:
+    first = window[0]['metadata']
+    last = window[-1]['metadata']
+    start = float(first.get('start', 0))
+    end = float(last.get('start', 0)) + float(last.get('duration', 0))
+    return {
+        'text': " ".join(s['text'] for s in window),
+        'metadata': {
+            'video_id': first['video_id'],
+            'title': first['title'],
+            'language': first.get('language'),
+            'start': start,
+            'duration': max(end - start, 0.0)
+        }
+    }
+
+
+def chunk_segments(segments: List[Dict], max_tokens: int = 128, overlap_tokens: int = 32,
+                   count_tokens: Optional[Callable[[str], int]] = None) -> List[Dict]:
+    """Merge adjacent caption segments into overlapping windows.
+
+    Each window holds as many consecutive segments as fit in max_tokens and starts
+    with the trailing segments of the previous window, up to overlap_tokens, so
+    an answer that straddles a boundary appears whole in at least one window. A
+    single segment longer than max_tokens becomes its own window.
+
+    Args:
+        segments (List[Dict]): Segment records ({'text', 'metadata'}) of one video,
+            in time order
+        max_tokens (int): Token budget per window
+        overlap_tokens (int): Tokens carried over from the previous window
+        count_tokens (Callable): Token counter, defaults to approx_token_count
+
+    Returns:
+        List[Dict]: Window records; 'start' is the first segment's start and
+            'duration' runs to the end of the last segment
+    """
+    count_tokens = count_tokens or approx_token_count
+    sizes = [count_tokens(segment['text']) for segment in segments]
+    return [_merge(window) for window in token_windows(segments, sizes, max_tokens, overlap_tokens)]
+
+
+def segmenter_name(max_tokens: Optional[int], overlap_tokens: int) -> str:
+    """Name of a segmentation setting, recorded in the index cache manifest."""
+    return f"chunks:{max_tokens}/{overlap_tokens}" if max_tokens else "raw"
+
+
+def transcript_segments(data: Dict, max_tokens: Optional[int] = 128, overlap_tokens: int = 32) -> List[Dict]:
+    """Turn a downloaded transcript into segment records, chunked if max_tokens is set.
+
+    Args:
+        data (Dict): Transcript data as written by TranscriptDownloader
+        max_tokens (int): Token budget per chunk; None keeps one record per caption line
+        overlap_tokens (int): Tokens each chunk repeats from the previous one
+
+    Returns:
+        List[Dict]: Segment records ({'text', 'metadata'}) in time order
+    """
+    segments = []
+    if 'transcript' in data:
+        for segment in data['transcript']:
+            segments.append({
+                'text': segment['text'],
+                'metadata': {
+                    'video_id': data['video_info']['video_id'],
+                    'title': data['video_info']['title'],
+                    'language': data.get('language'),
+                    'start': segment.get('start', 0),
+                    'duration': segment.get('duration', 0)
+                }
+            })
+    if max_tokens:
+        segments = chunk_segments(segments, max_tokens, overlap_tokens)
+    return segments
+
+
+def fit_context(texts: List[str], max_tokens: int,
+                count_tokens: Optional[Callable[[str], int]] = None) -> str:
+    """Join ranked texts until the token budget is reached.
+
+    The first text is always included so a query never gets an empty context.
+
+    Args:
+        texts (List[str]): Retrieved texts, best first
+        max_tokens (int): Token budget for the joined context
+        count_tokens (Callable): Token counter, defaults to approx_token_count
+
+    Returns:
+        str: Context for the QA model
+    """
+    count_tokens = count_tokens or approx_token_count
+    selected = []
+    used = 0
+    for text in texts:
+        size = count_tokens(text)
+        if selected and used + size > max_tokens:
+            break
+        selected.append(text)
+        used += size
+    return " ".join(selected)
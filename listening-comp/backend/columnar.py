@@ -0,0 +1,82 @@
+import json
+import zipfile
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+# Bumped when the column layout changes
+FORMAT_VERSION = 3
+
+
+def string_column(name: str, values: Iterable[Optional[str]]) -> Dict[str, np.ndarray]:
+    """Dictionary-encode strings into numpy arrays named <name>.codes/.text/.offsets.
+
+    Distinct values are stored once in a UTF-8 buffer with an offsets array, and
+    each row holds the int32 code of its value; None is stored as code -1. Columns
+    like levels or example sentences shared by many words shrink to a few bytes
+    per row.
+    """
+    codes_by_value: Dict[str, int] = {}
+    codes = []
+    for value in values:
+        if value is None:
+            codes.append(-1)
+            continue
+        code = codes_by_value.get(value)
+        if code is None:
+            code = codes_by_value[value] = len(codes_by_value)
+        codes.append(code)
+
+    # Offsets count characters, so reading decodes the buffer once and slices it
+    offsets = np.zeros(len(codes_by_value) + 1, dtype='int64')
+    np.cumsum([len(value) for value in codes_by_value], out=offsets[1:])
+    return {
+        f"{name}.codes": np.array(codes, dtype='int32'),
+        f"{name}.text": np.frombuffer("".join(codes_by_value).encode('utf-8'), dtype='uint8'),
+        f"{name}.offsets": offsets
+    }
+
+
+def read_string_column(columns, name: str) -> List[Optional[str]]:
+    """Decode a column written by string_column()."""
+    text = columns[f"{name}.text"].tobytes().decode('utf-8')
+    offsets = columns[f"{name}.offsets"].tolist()
+    values = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    return [values[code] if code >= 0 else None for code in columns[f"{name}.codes"].tolist()]
+
+
+def json_column(name: str, value) -> Dict[str, np.ndarray]:
+    """Store a JSON value as a UTF-8 byte array, for metadata and nested fields."""
+    return {name: np.frombuffer(json.dumps(value, ensure_ascii=False).encode('utf-8'), dtype='uint8')}
+
+
+def read_json_column(columns, name: str):
+    return json.loads(columns[name].tobytes().decode('utf-8'))
+
+
+def write_columns(filepath: str, columns: Dict[str, np.ndarray], compress: bool = False):
+    """Write named arrays to one .npz archive, optionally zip-compressed."""
+    columns = {'format_version': np.array([FORMAT_VERSION]), **columns}
+    with open(filepath, 'wb') as f:
+        if compress:
+            np.savez_compressed(f, **columns)
+        else:
+            np.savez(f, **columns)
+
+
+def open_columns(filepath: str):
+    """Open an archive written by write_columns().
+
+    Arrays are read from disk only when their name is looked up, so callers that
+    need one section pay only for that section's columns.
+    """
+    columns = np.load(filepath, allow_pickle=False)
+    version = int(columns['format_version'][0])
+    if version != FORMAT_VERSION:
+        columns.close()
+        raise ValueError(f"Unsupported columnar format version {version} in {filepath}")
+    return columns
+
+
+def is_columnar_file(filepath: str) -> bool:
+    """True for .npz archives, whatever their extension; JSON files are not zips."""
+    return zipfile.is_zipfile(filepath)
@@ -0,0 +1,98 @@
+import re
+import time
+import threading
+from typing import Dict, List, Optional
+
+# Canned question blocks per section, in the format the structuring prompts ask for
+_SECTION_TEMPLATES = {
+    1: """<question>
+Introduction:
+{line}
+
+Conversation:
+{line}
+
+Question:
+{line}
+
+Options:
+1. یک
+2. دو
+3. سه
+4. چهار
+</question>""",
+    2: """<question>
+Introduction:
+{line}
+
+Conversation:
+{line}
+
+Question:
+{line}
+</question>""",
+    3: """<question>
+Situation:
+{line}
+
+Question:
+何と言いますか
+</question>"""
+}
+
+
+class FakeBedrockError(Exception):
+    def __init__(self, code: str):
+        """Error shaped like botocore's ClientError, with the code under response['Error']"""
+        super().__init__(f"An error occurred ({code}) when calling the Converse operation")
+        self.response = {'Error': {'Code': code, 'Message': str(self)}}
+
+
+class FakeBedrockClient:
+    def __init__(self, latency: float = 0.5, questions_per_call: int = 2, throttle_first: int = 0,
+                 fail_on: Optional[str] = None):
+        """Offline stand-in for the bedrock-runtime client, for tests and timing without AWS
+
+        converse() sleeps for latency seconds and answers with one question block per
+        transcript line (up to questions_per_call), for the section the prompt names.
+        The first throttle_first calls raise a ThrottlingException, and prompts that
+        contain fail_on raise a ValidationException. Calls and the peak number of
+        concurrent calls are recorded.
+        """
+        self.latency = latency
+        self.questions_per_call = questions_per_call
+        self.throttle_first = throttle_first
+        self.fail_on = fail_on
+        self.calls: List[Dict] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def converse(self, modelId: str, messages: List[Dict], inferenceConfig: Optional[Dict] = None, **kwargs) -> Dict:
+        prompt = messages[0]['content'][0]['text']
+        with self._lock:
+            self.calls.append({'modelId': modelId, 'prompt': prompt, 'inferenceConfig': inferenceConfig})
+            throttled = len(self.calls) <= self.throttle_first
+        if throttled:
+            raise FakeBedrockError('ThrottlingException')
+        if self.fail_on and self.fail_on in prompt:
+            raise FakeBedrockError('ValidationException')
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        match = re.search(r'問題(\d)', prompt)
+        section = int(match.group(1)) if match else 2
+        transcript = prompt.split("Here's the transcript:\n", 1)[-1]
+        lines = [line.strip() for line in transcript.splitlines() if line.strip()][:self.questions_per_call]
+        text = "\n\n".join(_SECTION_TEMPLATES[section].format(line=line) for line in lines)
+        return {
+            'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}},
+            'stopReason': 'end_turn',
+            'usage': {'inputTokens': len(prompt.split()), 'outputTokens': len(text.split())}
+        }
@@ -0,0 +1,201 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+import numpy as np
+import faiss
+
+CACHE_VERSION = 3
+
+
+def content_hash(data: Dict) -> str:
+    """Hash a transcript by its parsed content rather than its file bytes.
+
+    Args:
+        data (Dict): Transcript data as written by TranscriptDownloader
+
+    Returns:
+        str: Hex digest that is stable across JSON formatting changes
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class IndexCache:
+    def __init__(self, cache_dir: str, model_name: str, embedding_size: int, segmenter: str = "raw"):
+        """On-disk cache of transcript embeddings and the FAISS index built from them.
+
+        Layout:
+            manifest.json        model name, embedding size, one entry per transcript and
+                                 the keys of transcripts removed on purpose
+            segments/<key>.json  segment texts and metadata for one transcript
+            vectors/<key>.npy    float32 embeddings for one transcript
+            index.faiss          snapshot of the full index, valid while the index type
+                                 and key/hash signature recorded alongside it still match
+
+        Args:
+            cache_dir (str): Directory the cache lives in
+            model_name (str): Sentence transformer the vectors were produced with
+            embedding_size (int): Dimension of the vectors
+            segmenter (str): Description of how transcripts were split into segments
+        """
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.embedding_size = embedding_size
+        self.segmenter = segmenter
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.index_path = os.path.join(cache_dir, "index.faiss")
+        self.manifest = self._load_manifest()
+        # Set by every manifest change and cleared by save_manifest()
+        self.dirty = False
+
+    def _empty_manifest(self) -> Dict:
+        return {
+            'version': CACHE_VERSION,
+            'model_name': self.model_name,
+            'embedding_size': self.embedding_size,
+            'segmenter': self.segmenter,
+            'index_spec': None,
+            'index_signature': None,
+            'transcripts': {},
+            'removed': []
+        }
+
+    def _load_manifest(self) -> Dict:
+        """Load the manifest, discarding it if it was built for another model, dimension or segmenter."""
+        if not os.path.exists(self.manifest_path):
+            return self._empty_manifest()
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Error loading index cache manifest: {str(e)}")
+            return self._empty_manifest()
+
+        if (manifest.get('version') != CACHE_VERSION
+                or manifest.get('model_name') != self.model_name
+                or manifest.get('embedding_size') != self.embedding_size
+                or manifest.get('segmenter') != self.segmenter):
+            print("Index cache was built for a different model or segmenter, rebuilding")
+            return self._empty_manifest()
+        manifest.setdefault('removed', [])
+        return manifest
+
+    def save_manifest(self):
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self.dirty = False
+
+    def _segments_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "segments", f"{key}.json")
+
+    def _vectors_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "vectors", f"{key}.npy")
+
+    def keys(self) -> List[str]:
+        return sorted(self.manifest['transcripts'])
+
+    def entry(self, key: str) -> Optional[Dict]:
+        return self.manifest['transcripts'].get(key)
+
+    def is_fresh(self, key: str, stat: os.stat_result) -> bool:
+        """Cheap check: the file has the same size and mtime as when it was cached."""
+        entry = self.entry(key)
+        return bool(entry) and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+
+    def touch(self, key: str, stat: os.stat_result):
+        """Record a new size/mtime for a file whose content hash did not change."""
+        entry = self.entry(key)
+        if entry:
+            entry['size'] = stat.st_size
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self.dirty = True
+
+    def put(self, key: str, digest: str, segments: List[Dict], vectors: np.ndarray,
+            stat: Optional[os.stat_result] = None):
+        """Store the segments and vectors for one transcript.
+
+        Args:
+            key (str): Transcript key (file name without extension)
+            digest (str): Content hash of the transcript
+            segments (List[Dict]): One dict per segment with 'text' and 'metadata'
+            vectors (np.ndarray): Embeddings aligned with segments
+            stat (os.stat_result): Stat of the source file, if it came from disk
+        """
+        os.makedirs(os.path.dirname(self._segments_path(key)), exist_ok=True)
+        os.makedirs(os.path.dirname(self._vectors_path(key)), exist_ok=True)
+        with open(self._segments_path(key), 'w', encoding='utf-8') as f:
+            json.dump(segments, f, ensure_ascii=False)
+        np.save(self._vectors_path(key), np.asarray(vectors, dtype='float32'))
+
+        self.manifest['transcripts'][key] = {
+            'hash': digest,
+            'count': len(segments),
+            'size': stat.st_size if stat else None,
+            'mtime_ns': stat.st_mtime_ns if stat else None
+        }
+        self.dirty = True
+
+    def merge(self, entries: Dict[str, Dict]):
+        """Record transcripts whose files another process already wrote into this cache."""
+        self.manifest['transcripts'].update(entries)
+        self.dirty = True
+
+    def drop(self, key: str):
+        """Forget a transcript and delete its files."""
+        if self.manifest['transcripts'].pop(key, None) is not None:
+            self.dirty = True
+        for path in (self._segments_path(key), self._vectors_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def mark_removed(self, key: str):
+        """Remember that a transcript was removed on purpose, so loads skip its file."""
+        if key not in self.manifest['removed']:
+            self.manifest['removed'].append(key)
+            self.dirty = True
+
+    def is_removed(self, key: str) -> bool:
+        return key in self.manifest['removed']
+
+    def restore(self, key: str):
+        """Let a removed transcript be indexed again."""
+        if key in self.manifest['removed']:
+            self.manifest['removed'].remove(key)
+            self.dirty = True
+
+    def load_segments(self, key: str) -> List[Dict]:
+        with open(self._segments_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_vectors(self, key: str) -> np.ndarray:
+        return np.load(self._vectors_path(key))
+
+    def _signature(self, keys: List[str]) -> List[List[str]]:
+        return [[key, self.manifest['transcripts'][key]['hash']] for key in keys]
+
+    def load_index(self, keys: List[str], spec: str) -> Optional[faiss.Index]:
+        """Return the index snapshot if it has this type and was built from exactly these transcript versions."""
+        if (self.manifest.get('index_spec') != spec
+                or self.manifest.get('index_signature') != self._signature(keys)
+                or not os.path.exists(self.index_path)):
+            return None
+        try:
+            return faiss.read_index(self.index_path)
+        except Exception as e:
+            print(f"Error loading cached index: {str(e)}")
+            return None
+
+    def save_index(self, index: faiss.Index, keys: List[str], spec: str):
+        """Snapshot the index and record which transcript versions it covers."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+        self.manifest['index_spec'] = spec
+        self.manifest['index_signature'] = self._signature(keys)
+        self.dirty = True
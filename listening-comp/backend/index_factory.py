@@ -0,0 +1,180 @@
+import math
+from typing import Optional
+import numpy as np
+import faiss
+
+# Supported index types, from exact brute force to compressed approximate search
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'ivfpq')
+
+# Vector encodings: full precision, half precision or 8-bit scalar quantization
+ENCODINGS = ('float32', 'fp16', 'sq8')
+_ENCODING_SUFFIX = {'float32': 'Flat', 'fp16': 'SQfp16', 'sq8': 'SQ8'}
+
+# Below this many vectors an approximate index is not worth training
+DEFAULT_ANN_THRESHOLD = 10000
+
+# PQ codebooks have 2^8 centroids and k-means wants about 39 points per centroid;
+# smaller corpora get IVF-Flat instead of IVF-PQ
+PQ_NBITS = 8
+PQ_MIN_TRAINING = 39 * 2 ** PQ_NBITS
+
+# Training samples are capped at this many points per IVF list (and PQ_MIN_TRAINING overall)
+TRAINING_POINTS_PER_LIST = 64
+
+
+class IndexConfig:
+    def __init__(self, index_type: str = 'flat', ann_threshold: int = DEFAULT_ANN_THRESHOLD,
+                 nprobe: int = 16, hnsw_m: int = 32, ef_search: int = 64, pq_m: int = 48,
+                 encoding: str = 'float32'):
+        """Settings for the FAISS index used by the RAG system.
+
+        Args:
+            index_type (str): One of 'flat', 'ivf', 'hnsw' or 'ivfpq'
+            ann_threshold (int): Corpus size at which the approximate index replaces
+                the flat one; smaller corpora always use 'flat'
+            nprobe (int): IVF lists probed per query
+            hnsw_m (int): HNSW graph degree
+            ef_search (int): HNSW candidate list size per query
+            pq_m (int): Number of PQ sub-quantizers (must divide the dimension)
+            encoding (str): How 'flat', 'ivf' and 'hnsw' store vectors: 'float32',
+                'fp16' (half the memory) or 'sq8' (a quarter); 'ivfpq' always uses PQ
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type}, expected one of {INDEX_TYPES}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding}, expected one of {ENCODINGS}")
+        self.index_type = index_type
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.encoding = encoding
+
+    def effective_type(self, n_vectors: int) -> str:
+        """Index type to build for a corpus of this size."""
+        # Approximate indexes need training data, so an empty index starts flat
+        if self.index_type != 'flat' and (n_vectors < self.ann_threshold or n_vectors == 0):
+            return 'flat'
+        if self.index_type == 'ivfpq' and n_vectors < PQ_MIN_TRAINING:
+            return 'ivf'
+        return self.index_type
+
+    def effective_encoding(self, n_vectors: int) -> str:
+        """Vector encoding to use for a corpus of this size."""
+        if self.effective_type(n_vectors) == 'ivfpq':
+            return 'pq'
+        # SQ8 needs training data, so an empty index starts at full precision
+        if n_vectors == 0:
+            return 'float32'
+        return self.encoding
+
+    def kind(self, n_vectors: int) -> tuple:
+        """(index type, encoding) for a corpus of this size; a change means a rebuild."""
+        return self.effective_type(n_vectors), self.effective_encoding(n_vectors)
+
+    def description(self, dim: int, n_vectors: int) -> str:
+        """FAISS index_factory string for a corpus of this size.
+
+        Flat and HNSW indexes number vectors by position, so they are wrapped in
+        IDMap2 to carry store row ids. IVF lists store ids natively; an IDMap2
+        around them would renumber the wrong vectors on remove_ids.
+        """
+        index_type, encoding = self.kind(n_vectors)
+        if index_type == 'flat':
+            return "IDMap2," + ("Flat" if encoding == 'float32' else _ENCODING_SUFFIX[encoding])
+        if index_type == 'hnsw':
+            suffix = "" if encoding == 'float32' else f",{_ENCODING_SUFFIX[encoding]}"
+            return f"IDMap2,HNSW{self.hnsw_m}{suffix}"
+
+        nlist = self.nlist(n_vectors)
+        if index_type == 'ivf':
+            return f"IVF{nlist},{_ENCODING_SUFFIX[encoding]}"
+
+        pq_m = self.pq_m
+        while dim % pq_m:
+            pq_m -= 1
+        return f"IVF{nlist},PQ{pq_m}x{PQ_NBITS}"
+
+    def nlist(self, n_vectors: int) -> int:
+        """IVF list count: about 4 * sqrt(n), with at least 39 training points per list."""
+        return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+    def training_size(self, n_vectors: int) -> int:
+        """How many of the vectors to train on; k-means gains little from more."""
+        return min(n_vectors, max(PQ_MIN_TRAINING, TRAINING_POINTS_PER_LIST * self.nlist(n_vectors)))
+
+
+def build_index(dim: int, vectors: Optional[np.ndarray] = None, ids: Optional[np.ndarray] = None,
+                config: Optional[IndexConfig] = None) -> faiss.Index:
+    """Build an index keyed by the given ids, training it on the vectors when the type needs it.
+
+    Args:
+        dim (int): Vector dimension
+        vectors (np.ndarray): Vectors to add, float32 of shape (n, dim)
+        ids (np.ndarray): int64 ids for the vectors, defaults to 0..n-1
+        config (IndexConfig): Index settings, defaults to flat
+
+    Returns:
+        faiss.Index: The populated index
+    """
+    config = config or IndexConfig()
+    n_vectors = 0 if vectors is None else len(vectors)
+    index = faiss.index_factory(dim, config.description(dim, n_vectors))
+
+    if n_vectors:
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if not index.is_trained:
+            sample = vectors
+            n_train = config.training_size(n_vectors)
+            if n_train < n_vectors:
+                rows = np.random.default_rng(0).choice(n_vectors, n_train, replace=False)
+                sample = vectors[np.sort(rows)]
+            index.train(sample)
+        if ids is None:
+            ids = np.arange(n_vectors, dtype='int64')
+        index.add_with_ids(vectors, ids)
+
+    apply_search_params(index, config)
+    return index
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig):
+    """Set query-time parameters (nprobe / efSearch) on whatever index is inside."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = config.nprobe
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = config.ef_search
+
+
+def filtered_search_params(config: IndexConfig, index_type: str, rows: np.ndarray) -> faiss.SearchParameters:
+    """Search parameters that restrict a search to the given ids.
+
+    The selector is evaluated inside the index scan, so vectors outside the filter
+    are skipped before any distance is computed and the top-k is taken over the
+    matching vectors only. Contiguous id ranges (one transcript) use a range check;
+    anything else uses a hashed id set.
+
+    Args:
+        config (IndexConfig): Settings for nprobe / efSearch
+        index_type (str): Effective index type ('flat', 'ivf', 'hnsw' or 'ivfpq')
+        rows (np.ndarray): Allowed ids, ascending
+
+    Returns:
+        faiss.SearchParameters: Parameters to pass as index.search(..., params=...)
+    """
+    if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+        selector = faiss.IDSelectorRange(int(rows[0]), int(rows[-1]) + 1)
+    else:
+        selector = faiss.IDSelectorBatch(np.ascontiguousarray(rows, dtype='int64'))
+
+    if index_type in ('ivf', 'ivfpq'):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=config.nprobe)
+    elif index_type == 'hnsw':
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=config.ef_search)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # SWIG does not keep the selector alive on its own
+    params.selector_ref = selector
+    return params
@@ -0,0 +1,298 @@
+"""Stream videos through download -> structure -> parse -> index in one process.
+
+Each stage has its own worker threads and a bounded input queue, so a video
+moves to the next stage as soon as it is ready and a slow stage holds back the
+ones before it instead of piling work up in memory. Transcripts, question text
+and parsed questions are handed over in memory; only the downloader's own
+transcript file and the store's appends touch the disk.
+
+    python -m backend.ingest_pipeline https://www.youtube.com/watch?v=sY7L5cfCWno
+"""
+import time
+import queue
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional
+from backend.vector_store import parse_questions_text
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Dict], Dict], workers: int = 1, queue_size: int = 8):
+        """One pipeline stage: worker threads that apply func to items from a bounded queue.
+
+        Args:
+            name (str): Stage name used in metrics
+            func (Callable): Takes an item dict and returns it updated; raising, or
+                returning anything but a dict, marks the item as failed and drops it
+                from the rest of the pipeline
+            workers (int): Worker threads
+            queue_size (int): Items that can wait in front of the stage
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.input: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.next: Optional['Stage'] = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self.reset()
+
+    def reset(self):
+        """Clear results and metrics before a run."""
+        self.failed: List[Dict] = []
+        self.completed: List[Dict] = []
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def put(self, item) -> float:
+        """Queue an item, returning how long the caller was blocked by a full queue."""
+        start = time.perf_counter()
+        self.input.put(item)
+        blocked = time.perf_counter() - start
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.input.qsize())
+        return blocked
+
+    def start(self) -> List[threading.Thread]:
+        self._running = self.workers
+        threads = [
+            threading.Thread(target=self._work, name=f"ingest-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _work(self):
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self.input.get()
+                waited = time.perf_counter() - start
+                if item is _DONE:
+                    # Let the sibling workers see the end too
+                    self.input.put(_DONE)
+                    return
+                self._process(item, waited)
+        finally:
+            # However the worker exits, the last one out tells the next stage
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last and self.next:
+                self.next.put(_DONE)
+
+    def _process(self, item: Dict, waited: float):
+        """Apply func to one item and forward it, or record it as failed.
+
+        The bookkeeping sits in a finally block, so every item is counted and
+        either handed on or listed in failed, including when func returns
+        something other than the item.
+        """
+        start = time.perf_counter()
+        busy = None
+        blocked = 0.0
+        error = None
+        forwarded = False
+        try:
+            result = self.func(item)
+            if not isinstance(result, dict):
+                raise TypeError(f"returned {type(result).__name__} instead of the item")
+            item = result
+            busy = time.perf_counter() - start
+            item.setdefault('timings', {})[self.name] = busy
+            if self.next:
+                blocked = self.next.put(item)
+            forwarded = True
+        except Exception as e:
+            error = e
+        finally:
+            if busy is None:
+                busy = time.perf_counter() - start
+            if not forwarded:
+                item.setdefault('timings', {})[self.name] = busy
+                message = str(error) if error is not None else "interrupted"
+                item['error'] = f"{self.name}: {message}"
+                print(f"Error in {self.name} stage for {item.get('url')}: {message}")
+
+            with self._lock:
+                self.processed += 1
+                self.busy_seconds += busy
+                self.starved_seconds += waited
+                self.blocked_seconds += blocked
+                if not forwarded:
+                    self.failed.append(item)
+                elif not self.next:
+                    self.completed.append(item)
+
+    def metrics(self) -> Dict:
+        """Work done and where the stage spent its time.
+
+        starved_seconds is worker time spent waiting for input (the stage is faster
+        than its feed); blocked_seconds is time spent waiting for room in the next
+        stage's queue (backpressure from a slower stage downstream).
+        """
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': len(self.failed),
+            'busy_seconds': self.busy_seconds,
+            'mean_seconds': self.busy_seconds / self.processed if self.processed else 0.0,
+            'starved_seconds': self.starved_seconds,
+            'blocked_seconds': self.blocked_seconds,
+            'queue_depth': self.input.qsize(),
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+class IngestPipeline:
+    def __init__(self, downloader=None, structurer=None, store=None, rag_system=None,
+                 download_workers: int = 2, structure_workers: int = 4, parse_workers: int = 1,
+                 index_workers: int = 1, queue_size: int = 8, languages: Optional[List[str]] = None):
+        """Download, structure, parse and index YouTube videos as a streaming pipeline.
+
+        Args:
+            downloader: TranscriptDownloader, created if not given
+            structurer: TranscriptStructurer, created if not given
+            store: SimpleVectorStore for the parsed questions, created if not given
+            rag_system: Optional RAGSystem that also gets each transcript
+            download_workers (int): Concurrent transcript downloads
+            structure_workers (int): Transcripts structured at once (Bedrock calls are
+                further bounded by the structurer's max_concurrency)
+            parse_workers (int): Question parsing threads
+            index_workers (int): Indexing threads; keep at 1 unless the store is thread-safe
+            queue_size (int): Items allowed to wait in front of each stage
+            languages (List[str]): Transcript languages to try, in order of preference
+        """
+        if downloader is None:
+            from backend.get_transcript import TranscriptDownloader
+            downloader = TranscriptDownloader()
+        if structurer is None:
+            from backend.structured_data import TranscriptStructurer
+            structurer = TranscriptStructurer()
+        if store is None:
+            from backend.vector_store import SimpleVectorStore
+            store = SimpleVectorStore()
+        self.downloader = downloader
+        self.structurer = structurer
+        self.store = store
+        self.rag_system = rag_system
+        self.languages = languages or ['fa', 'en']
+
+        self.stages = [
+            Stage('download', self._download, download_workers, queue_size),
+            Stage('structure', self._structure, structure_workers, queue_size),
+            Stage('parse', self._parse, parse_workers, queue_size),
+            Stage('index', self._index, index_workers, queue_size)
+        ]
+        for stage, following in zip(self.stages, self.stages[1:]):
+            stage.next = following
+        self.feed_blocked_seconds = 0.0
+        self.seconds = 0.0
+
+    def _download(self, item: Dict) -> Dict:
+        data = self.downloader.download_transcript(item['url'], self.languages)
+        if 'error' in data:
+            raise RuntimeError(data['error'])
+        item['data'] = data
+        item['video_id'] = data['video_info']['video_id']
+        return item
+
+    def _structure(self, item: Dict) -> Dict:
+        text = "\n".join(segment.get('text', '') for segment in item['data'].get('transcript', []))
+        item['sections'] = self.structurer.structure_transcript(text, raise_on_error=True)
+        return item
+
+    def _parse(self, item: Dict) -> Dict:
+        item['questions'] = {
+            f"section{section_num}": parse_questions_text(content)
+            for section_num, content in item['sections'].items()
+        }
+        return item
+
+    def _index(self, item: Dict) -> Dict:
+        item['indexed'] = {
+            section: self.store.add_questions(section, questions)
+            for section, questions in item['questions'].items() if questions
+        }
+        if self.rag_system is not None:
+            self.rag_system.add_transcript(item['data'])
+        return item
+
+    def run(self, urls: List[str]) -> Dict:
+        """Push every URL through the pipeline and wait for it to drain.
+
+        Returns:
+            Dict: 'completed' and 'failed' items (url, video_id, per-stage timings,
+                indexed counts or error) and per-stage 'metrics'
+        """
+        start = time.perf_counter()
+        self.feed_blocked_seconds = 0.0
+        for stage in self.stages:
+            stage.reset()
+        threads = [thread for stage in self.stages for thread in stage.start()]
+        for url in urls:
+            # The caller feels backpressure too once the download queue is full
+            self.feed_blocked_seconds += self.stages[0].put({'url': url})
+        self.stages[0].put(_DONE)
+        for thread in threads:
+            thread.join()
+        self.seconds = time.perf_counter() - start
+        # The last worker of each stage left the end marker behind; clear it for the next run
+        for stage in self.stages:
+            stage.input.get_nowait()
+
+        def summary(item: Dict) -> Dict:
+            return {key: item.get(key) for key in ('url', 'video_id', 'timings', 'indexed', 'error')}
+
+        return {
+            'completed': [summary(item) for item in self.stages[-1].completed],
+            'failed': [summary(item) for stage in self.stages for item in stage.failed],
+            'metrics': self.metrics()
+        }
+
+    def metrics(self) -> Dict:
+        return {
+            'seconds': self.seconds,
+            'feed_blocked_seconds': self.feed_blocked_seconds,
+            'stages': {stage.name: stage.metrics() for stage in self.stages}
+        }
+
+    def print_metrics(self):
+        metrics = self.metrics()
+        print(f"\n{'stage':<10}{'workers':>8}{'done':>6}{'failed':>8}{'mean s':>9}{'busy s':>9}"
+              f"{'starved s':>11}{'blocked s':>11}{'max queue':>11}")
+        for name, m in metrics['stages'].items():
+            print(f"{name:<10}{m['workers']:>8}{m['processed'] - m['failed']:>6}{m['failed']:>8}"
+                  f"{m['mean_seconds']:>9.2f}{m['busy_seconds']:>9.2f}{m['starved_seconds']:>11.2f}"
+                  f"{m['blocked_seconds']:>11.2f}{m['max_queue_depth']:>11}")
+        print(f"Total {metrics['seconds']:.1f}s, feed blocked {metrics['feed_blocked_seconds']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls', nargs='+', help="YouTube video URLs")
+    parser.add_argument('--download-workers', type=int, default=2)
+    parser.add_argument('--structure-workers', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=8)
+    args = parser.parse_args()
+
+    pipeline = IngestPipeline(download_workers=args.download_workers, structure_workers=args.structure_workers,
+                              parse_workers=args.parse_workers, queue_size=args.queue_size)
+    result = pipeline.run(args.urls)
+    for item in result['completed']:
+        print(f"Indexed {item['video_id']}: {item['indexed']}")
+    for item in result['failed']:
+        print(f"Failed {item['url']}: {item['error']}")
+    pipeline.print_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import math
+from collections import Counter
+from typing import Container, Dict, List, Optional, Tuple
+from backend.persian_text import normalize_persian
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized Persian text into lookup terms."""
+    return normalize_persian(text).split()
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Inverted index over segment rows with Okapi BM25 scoring.
+
+        Rows are the same ids the FAISS index uses, so lexical and dense hits can be
+        fused directly. Removing a row deletes its postings, and terms left without
+        postings leave the vocabulary, so document frequencies, lengths and the
+        average length only ever cover live rows.
+
+        Args:
+            k1 (float): Term frequency saturation
+            b (float): Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        # Distinct terms of each row, so removal can find its postings
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, row: int, text: str):
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[row] = tf
+        self.doc_lengths[row] = len(terms)
+        self._doc_terms[row] = tuple(counts)
+        self._total_length += len(terms)
+
+    def remove(self, row: int):
+        length = self.doc_lengths.pop(row, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(row):
+            postings = self.postings[term]
+            del postings[row]
+            if not postings:
+                del self.postings[term]
+
+    def document_frequency(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+    def search(self, query: str, k: int = 5, allowed: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        """Rank rows by BM25 against the query.
+
+        Args:
+            query (str): Query text
+            k (int): Number of rows to return
+            allowed (Container[int]): Only rank these rows (corpus statistics still
+                cover every live row)
+
+        Returns:
+            List[Tuple[int, float]]: (row, score) pairs, best first
+        """
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        avg_length = self._total_length / n_docs
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings.items():
+                if allowed is not None and row not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[row] / avg_length)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int, constant: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several rankings of row ids by reciprocal rank.
+
+    Args:
+        rankings (List[List[int]]): Row ids per retriever, best first
+        k (int): Number of rows to return
+        constant (int): Damping constant; 60 is the usual choice
+
+    Returns:
+        List[Tuple[int, float]]: (row, fused score) pairs, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (constant + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
@@ -0,0 +1,41 @@
+import re
+
+# Arabic code points that have a distinct Persian form
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    '٠': '۰', '١': '۱', '٢': '۲', '٣': '۳', '٤': '۴',
+    '٥': '۵', '٦': '۶', '٧': '۷', '٨': '۸', '٩': '۹',
+})
+
+# Harakat, tanvin, superscript alef and tatweel carry no meaning for lookup
+_DIACRITICS = re.compile(r'[\u064B-\u065F\u0670\u0640]')
+_PUNCTUATION = re.compile(r'[!-/:-@\[-`{-~\u00AB\u00BB\u060C\u061B\u061F\u2026]')
+_ZWNJ = '\u200c'
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_persian(text: str) -> str:
+    """Normalize Persian text for cache keys and lexical matching.
+
+    Unifies Arabic/Persian letter and digit variants, strips diacritics and
+    punctuation, turns zero-width non-joiners into spaces, lowercases Latin
+    text and collapses whitespace.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Normalized text
+    """
+    text = text.translate(_CHAR_MAP)
+    text = _DIACRITICS.sub('', text)
+    text = text.replace(_ZWNJ, ' ')
+    text = _PUNCTUATION.sub(' ', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
@@ -0,0 +1,83 @@
+import os
+from typing import Optional
+
+# 'pytorch' is the full-precision Hugging Face pipeline; the others trade a little
+# accuracy for CPU latency and must pass test_qa_parity.py before being enabled
+QA_BACKENDS = ('pytorch', 'torch-int8', 'onnx-int8')
+
+
+def _pytorch_pipeline(model_name: str):
+    from transformers import pipeline
+    return pipeline("question-answering", model=model_name)
+
+
+def _torch_int8_pipeline(model_name: str):
+    """Pipeline whose Linear layers use dynamic int8 quantization."""
+    import torch
+    from transformers import AutoModelForQuestionAnswering, AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForQuestionAnswering.from_pretrained(model_name)
+    model.eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("question-answering", model=model, tokenizer=tokenizer)
+
+
+def _onnx_int8_pipeline(model_name: str, export_dir: str):
+    """ONNX Runtime pipeline with dynamic int8 quantization.
+
+    The model is exported and quantized once into export_dir and reused after that.
+    """
+    from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    model_dir = os.path.join(export_dir, model_name.replace('/', '__'))
+    quantized_file = "model_quantized.onnx"
+    if not os.path.exists(os.path.join(model_dir, quantized_file)):
+        print(f"Exporting {model_name} to ONNX in {model_dir}")
+        ort_model = ORTModelForQuestionAnswering.from_pretrained(model_name, export=True)
+        ort_model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+        quantizer = ORTQuantizer.from_pretrained(model_dir)
+        config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=model_dir, quantization_config=config)
+
+    model = ORTModelForQuestionAnswering.from_pretrained(model_dir, file_name=quantized_file)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("question-answering", model=model, tokenizer=tokenizer)
+
+
+def load_qa_pipeline(model_name: str, backend: str = 'pytorch', export_dir: Optional[str] = None,
+                     fallback: bool = True):
+    """Load a question-answering pipeline on the requested CPU backend.
+
+    Every backend returns a Hugging Face pipeline, so callers keep using
+    pipeline(question=..., context=...) and get {'answer', 'score', ...} back. If
+    an accelerated backend cannot be loaded (for example optimum is not
+    installed), the full-precision pipeline is used instead unless fallback is off.
+
+    Args:
+        model_name (str): Hugging Face model id
+        backend (str): One of QA_BACKENDS
+        export_dir (str): Where ONNX exports are kept, defaults to backend/data/onnx
+        fallback (bool): Use pytorch when the backend fails to load instead of raising
+
+    Returns:
+        A question-answering pipeline
+    """
+    if backend not in QA_BACKENDS:
+        raise ValueError(f"Unknown QA backend {backend}, expected one of {QA_BACKENDS}")
+
+    try:
+        if backend == 'torch-int8':
+            return _torch_int8_pipeline(model_name)
+        if backend == 'onnx-int8':
+            return _onnx_int8_pipeline(model_name, export_dir or os.path.join("backend", "data", "onnx"))
+    except Exception as e:
+        if not fallback:
+            raise
+        print(f"Warning: Could not load {backend} QA backend, using pytorch: {str(e)}")
+
+    return _pytorch_pipeline(model_name)
@@ -1,97 +1,655 @@
 import os
 import json
-from typing import Dict, List, Optional
+import copy
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
-from transformers import pipeline
+from backend.chunker import fit_context, segmenter_name, transcript_segments
+from backend.index_cache import IndexCache, content_hash
+from backend.index_factory import IndexConfig, apply_search_params, build_index, filtered_search_params
+from backend.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from backend.lru_cache import LRUCache
+from backend.persian_text import normalize_persian
+from backend.qa_backends import load_qa_pipeline
+from backend.segment_store import SegmentStore
 
 class RAGSystem:
-    def __init__(self, data_dir: str = "backend/data/transcripts", model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self, data_dir: str = "backend/data/transcripts", model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 cache_dir: Optional[str] = None, embedding_size: int = 384,
+                 index_config: Optional[IndexConfig] = None, embedding_cache_size: int = 1024,
+                 result_cache_size: int = 256, qa_model_name: str = "timpal0l/mdeberta-v3-base-squad2",
+                 retrieval_only: bool = False, chunk_tokens: Optional[int] = 128, chunk_overlap: int = 32,
+                 context_tokens: int = 384, qa_backend: str = "pytorch", hybrid: bool = True):
         """Initialize the RAG system.
         
         Args:
             data_dir (str): Directory containing transcript files
             model_name (str): Name of the sentence transformer model to use
+            cache_dir (str): Directory for the persistent index cache, defaults to a
+                rag_cache directory next to data_dir
+            embedding_size (int): Size of embeddings from the model
+            index_config (IndexConfig): FAISS index type and search parameters,
+                defaults to exact flat search
+            embedding_cache_size (int): Query embeddings kept in memory, 0 disables
+            result_cache_size (int): query() results kept in memory, 0 disables
+            qa_model_name (str): Name of the question-answering model to use
+            retrieval_only (bool): Never load the QA model; query() returns the
+                retrieved context without an extracted answer
+            chunk_tokens (int): Token budget for merging adjacent caption lines into
+                one indexed chunk (the encoder truncates at 128); None indexes raw lines
+            chunk_overlap (int): Tokens each chunk repeats from the previous one
+            context_tokens (int): Token budget of the context passed to the QA model,
+                kept below its 512-token window so no stride passes are needed
+            qa_backend (str): CPU inference backend for the QA model: 'pytorch',
+                'torch-int8' or 'onnx-int8' (see backend/qa_backends.py)
+            hybrid (bool): Fuse dense retrieval with a BM25 index in query() and
+                answer single-word lookups from the BM25 index alone
         """
         self.data_dir = data_dir
-        self.model = SentenceTransformer(model_name)
-        self.qa_pipeline = pipeline("question-answering", model="timpal0l/mdeberta-v3-base-squad2")
+        self.model_name = model_name
+        self.qa_model_name = qa_model_name
+        self.retrieval_only = retrieval_only
+        self.qa_backend = qa_backend
+        self.hybrid = hybrid
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.context_tokens = context_tokens
+        
+        # Both models load on first use (or from start_warm_up), so a warm index
+        # cache makes startup independent of model size
+        self._model = None
+        self._qa_pipeline = None
+        self._model_lock = threading.Lock()
+        self._qa_lock = threading.Lock()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        
+        # Repeated questions skip the encoder and the QA model. Result keys include
+        # the index generation, which changes whenever the index does
+        self._generation = 0
+        self._embedding_cache = LRUCache(embedding_cache_size)
+        self._result_cache = LRUCache(result_cache_size)
         
         # Initialize FAISS index
-        self.embedding_size = 384  # Size of embeddings from the model
-        self.index = faiss.IndexFlatL2(self.embedding_size)
+        self.embedding_size = embedding_size
+        self.index_config = index_config or IndexConfig()
+        self.index = self._new_index()
+        
+        # Columnar store for segment text and metadata; index ids are its row ids
+        self.store = SegmentStore()
+        self._rows: Dict[str, np.ndarray] = {}
+        self._lexical: Optional[BM25Index] = None
+        self._query_count = 0
+        self._fast_path_count = 0
         
-        # Store for text segments and their metadata
-        self.segments = []
-        self.metadata = []
+        # Guards the index and segment store against the watcher thread
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        
+        # Embeddings are cached per transcript so restarts only encode what changed
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.normpath(data_dir)), "rag_cache")
+        segmenter = segmenter_name(chunk_tokens, chunk_overlap)
+        self.cache = IndexCache(self.cache_dir, model_name, self.embedding_size, segmenter)
         
         # Load and index all available transcripts
         self.load_transcripts()
     
+    @property
+    def model(self):
+        """Sentence transformer, loaded on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    start = time.perf_counter()
+                    self._model = SentenceTransformer(self.model_name)
+                    print(f"Loaded {self.model_name} in {time.perf_counter() - start:.1f}s")
+        return self._model
+    
+    @property
+    def qa_pipeline(self):
+        """Question-answering pipeline, loaded on first access; None in retrieval-only mode."""
+        if self.retrieval_only:
+            return None
+        if self._qa_pipeline is None:
+            with self._qa_lock:
+                if self._qa_pipeline is None:
+                    start = time.perf_counter()
+                    self._qa_pipeline = load_qa_pipeline(self.qa_model_name, self.qa_backend)
+                    print(f"Loaded {self.qa_model_name} ({self.qa_backend}) in {time.perf_counter() - start:.1f}s")
+        return self._qa_pipeline
+    
+    def start_warm_up(self):
+        """Load the models in a background thread so the first query does not pay for it."""
+        if self._warm_up_thread and self._warm_up_thread.is_alive():
+            return
+        
+        def warm_up():
+            try:
+                self.model
+                self.qa_pipeline
+            except Exception as e:
+                print(f"Error warming up models: {str(e)}")
+        
+        self._warm_up_thread = threading.Thread(target=warm_up, name="rag-warm-up", daemon=True)
+        self._warm_up_thread.start()
+    
+    def _retrieval_only_response(self, context: str) -> Dict:
+        return {
+            'answer': "",
+            'confidence': 0.0,
+            'context': context
+        }
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as a float32 matrix."""
+        if not texts:
+            return np.zeros((0, self.embedding_size), dtype='float32')
+        return np.array(self.model.encode(texts)).astype('float32')
+    
+    def _segments_from_transcript(self, data: Dict) -> List[Dict]:
+        """Turn a downloaded transcript into segment records, chunked if configured."""
+        return transcript_segments(data, self.chunk_tokens, self.chunk_overlap)
+    
+    def _new_index(self, vectors: Optional[np.ndarray] = None, ids: Optional[np.ndarray] = None) -> faiss.Index:
+        """Create an index whose ids are row ids in self.store.
+        
+        The index type follows self.index_config; approximate indexes are trained on
+        the given vectors. The bookkeeping is only updated once the build succeeded.
+        """
+        n_vectors = 0 if vectors is None else len(vectors)
+        index = build_index(self.embedding_size, vectors, ids, self.index_config)
+        self._trained_size = n_vectors
+        self._index_kind = self.index_config.kind(n_vectors)
+        self._stale = 0
+        self._generation += 1
+        return index
+    
+    def _index_spec(self, n_vectors: int) -> str:
+        return self.index_config.description(self.embedding_size, n_vectors)
+    
+    def _maybe_retrain(self):
+        """Rebuild the index from cached vectors when the corpus outgrew it.
+        
+        This switches from flat to the configured approximate index once the corpus
+        passes the threshold, and retrains IVF centroids when the corpus has doubled
+        since they were trained.
+        """
+        n_vectors = self.index.ntotal
+        wanted = self.index_config.kind(n_vectors)
+        current = self._index_kind
+        outgrown = current[0] in ('ivf', 'ivfpq') and n_vectors > 2 * self._trained_size
+        if wanted == current and not outgrown:
+            return
+        
+        keys = [key for key, ids in self._rows.items() if len(ids)]
+        if not keys:
+            return
+        vectors = np.vstack([self.cache.load_vectors(key) for key in keys])
+        ids = np.concatenate([self._rows[key] for key in keys])
+        self.index = self._new_index(vectors, ids)
+        print(f"Rebuilt {'/'.join(wanted)} index over {len(ids)} segments")
+    
+    def _read_transcript(self, filepath: str) -> Tuple[Dict, str]:
+        """Read a transcript file and return its data and content hash."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data, content_hash(data)
+    
+    def _append_rows(self, key: str, segments: List[Dict]) -> np.ndarray:
+        """Append segment records to the store and return their ids."""
+        ids = self.store.append(segments)
+        self._rows[key] = ids
+        if self._lexical is not None:
+            for row, segment in zip(ids, segments):
+                self._lexical.add(int(row), segment['text'])
+        self._generation += 1
+        return ids
+    
     def load_transcripts(self):
-        """Load all transcript files from the data directory and create embeddings."""
+        """Load all transcript files from the data directory and create embeddings.
+        
+        Transcripts whose content hash matches the cache are not re-embedded. When no
+        transcript changed the index snapshot is read back directly. Transcripts
+        taken out with remove_video() are skipped.
+        """
         if not os.path.exists(self.data_dir):
             print(f"Data directory {self.data_dir} does not exist")
             return
-            
-        for filename in os.listdir(self.data_dir):
+        
+        keys = []
+        changed = False
+        embedded = 0
+        for filename in sorted(os.listdir(self.data_dir)):
             if filename.endswith('.json'):
                 filepath = os.path.join(self.data_dir, filename)
+                key = os.path.splitext(filename)[0]
+                if self.cache.is_removed(key):
+                    continue
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        
-                    # Process transcript segments
-                    if 'transcript' in data:
-                        for segment in data['transcript']:
-                            text = segment['text']
-                            self.segments.append(text)
-                            self.metadata.append({
-                                'video_id': data['video_info']['video_id'],
-                                'title': data['video_info']['title'],
-                                'start': segment.get('start', 0),
-                                'duration': segment.get('duration', 0)
-                            })
+                    stat = os.stat(filepath)
+                    if not self.cache.is_fresh(key, stat):
+                        data, digest = self._read_transcript(filepath)
+                        entry = self.cache.entry(key)
+                        if entry and entry['hash'] == digest:
+                            self.cache.touch(key, stat)
+                        else:
+                            segments = self._segments_from_transcript(data)
+                            vectors = self._encode([s['text'] for s in segments])
+                            self.cache.put(key, digest, segments, vectors, stat)
+                            embedded += len(segments)
+                        changed = True
+                    keys.append(key)
                 except Exception as e:
                     print(f"Error loading transcript {filename}: {str(e)}")
         
-        # Create embeddings and add to index
-        if self.segments:
-            embeddings = self.model.encode(self.segments)
-            self.index.add(np.array(embeddings).astype('float32'))
-            print(f"Indexed {len(self.segments)} segments from transcripts")
+        # Forget transcripts that were deleted or can no longer be read
+        for key in self.cache.keys():
+            if key not in keys:
+                self.cache.drop(key)
+                changed = True
+        
+        with self._lock:
+            self.store = SegmentStore()
+            self._rows = {}
+            self._lexical = None
+            keys = self.cache.keys()
+            for key in keys:
+                self._append_rows(key, self.cache.load_segments(key))
+            
+            spec = self._index_spec(len(self.store))
+            index = self.cache.load_index(keys, spec)
+            if index is None or index.ntotal != len(self.store):
+                vectors = None
+                if len(self.store):
+                    vectors = np.vstack([self.cache.load_vectors(key) for key in keys])
+                self.index = self._new_index(vectors)
+                self.cache.save_index(self.index, keys, spec)
+                changed = True
+            else:
+                self.index = index
+                self._trained_size = index.ntotal
+                self._index_kind = self.index_config.kind(index.ntotal)
+                apply_search_params(self.index, self.index_config)
+            
+            if changed:
+                self.cache.save_manifest()
+        
+        if len(self.store):
+            print(f"Indexed {len(self.store)} segments from transcripts ({embedded} newly embedded)")
+    
+    def add_transcript(self, data: Dict, key: Optional[str] = None, stat: Optional[os.stat_result] = None) -> int:
+        """Embed one transcript and add it to the live index.
+        
+        Only the new segments are encoded. If the transcript was indexed before with
+        different content, its old segments are removed first. A transcript taken
+        out with remove_video() is indexed again by this call.
+        
+        Args:
+            data (Dict): Transcript data as returned by TranscriptDownloader.download_transcript
+            key (str): Cache key, defaults to the video id (the downloader's file name)
+            stat (os.stat_result): Stat of the source file, if it came from disk
+            
+        Returns:
+            int: Number of segments added
+        """
+        key = key or data['video_info']['video_id']
+        self.cache.restore(key)
+        digest = content_hash(data)
+        entry = self.cache.entry(key)
+        if entry and entry['hash'] == digest and key in self._rows:
+            if stat:
+                self.cache.touch(key, stat)
+                self.cache.save_manifest()
+            return 0
+        
+        segments = self._segments_from_transcript(data)
+        vectors = self._encode([s['text'] for s in segments])
+        
+        with self._lock:
+            self._remove_key(key)
+            ids = self._append_rows(key, segments)
+            if len(ids):
+                self.index.add_with_ids(vectors, ids)
+            self.cache.put(key, digest, segments, vectors, stat)
+            self.cache.save_manifest()
+            self._maybe_retrain()
+        
+        print(f"Added {len(segments)} segments from transcript {key}")
+        return len(segments)
+    
+    def _remove_key(self, key: str) -> int:
+        """Drop one transcript's rows from the index, leaving tombstones in the store."""
+        ids = self._rows.pop(key, None)
+        if ids is None or not len(ids):
+            return 0
+        self._generation += 1
+        try:
+            self.index.remove_ids(ids)
+        except RuntimeError:
+            # HNSW cannot delete; the tombstones below hide the stale vectors until
+            # the next rebuild and search over-fetches to make up for them
+            self._stale += len(ids)
+        self.store.remove(ids)
+        if self._lexical is not None:
+            for row in ids:
+                self._lexical.remove(int(row))
+        return len(ids)
+    
+    def remove_video(self, video_id: str) -> int:
+        """Remove every segment of a video from the live index and the cache.
+        
+        The transcript file itself is left in place. Its key is recorded in the cache
+        manifest, so load_transcripts(), sync_transcripts() and the watcher skip the
+        file from then on, across restarts too; add_transcript() brings it back.
+        
+        Args:
+            video_id (str): YouTube video id
+            
+        Returns:
+            int: Number of segments removed
+        """
+        removed = 0
+        with self._lock:
+            keys = [
+                key for key, ids in self._rows.items()
+                if key == video_id or (len(ids) and self.store.video_id(ids[0]) == video_id)
+            ]
+            for key in keys:
+                removed += self._remove_key(key)
+                self.cache.drop(key)
+                self.cache.mark_removed(key)
+            if keys:
+                self.cache.save_manifest()
+        return removed
+    
+    def sync_transcripts(self) -> int:
+        """Pick up transcript files that were added, changed or deleted since the last load.
+        
+        Returns:
+            int: Number of segments added or removed
+        """
+        if not os.path.exists(self.data_dir):
+            return 0
+        
+        changes = 0
+        seen = set()
+        for filename in sorted(os.listdir(self.data_dir)):
+            if filename.endswith('.json'):
+                filepath = os.path.join(self.data_dir, filename)
+                key = os.path.splitext(filename)[0]
+                seen.add(key)
+                if self.cache.is_removed(key):
+                    continue
+                try:
+                    stat = os.stat(filepath)
+                    if not self.cache.is_fresh(key, stat):
+                        data, _ = self._read_transcript(filepath)
+                        changes += self.add_transcript(data, key=key, stat=stat)
+                except Exception as e:
+                    # The downloader may still be writing the file; retry on the next pass
+                    print(f"Error syncing transcript {filename}: {str(e)}")
+        
+        with self._lock:
+            for key in [k for k in self._rows if k not in seen]:
+                changes += self._remove_key(key)
+                self.cache.drop(key)
+            # Polls that find nothing new leave the manifest alone
+            if self.cache.dirty:
+                self.cache.save_manifest()
+        return changes
+    
+    def start_watcher(self, interval: float = 5.0):
+        """Poll the data directory in a background thread and ingest new transcripts.
+        
+        Args:
+            interval (float): Seconds between directory scans
+        """
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._watcher_stop.clear()
+        
+        def watch():
+            while not self._watcher_stop.wait(interval):
+                try:
+                    self.sync_transcripts()
+                except Exception as e:
+                    print(f"Error in transcript watcher: {str(e)}")
+        
+        self._watcher = threading.Thread(target=watch, name="rag-transcript-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watcher(self):
+        """Stop the background directory watcher."""
+        self._watcher_stop.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, reusing cached embeddings where possible.
+        
+        The cache is keyed on the normalized query so spelling variants share an
+        entry, but a miss encodes the query as written: normalization drops the
+        ZWNJ and punctuation that indexed segments keep.
+        """
+        keys = [normalize_persian(q) for q in queries]
+        embeddings = [self._embedding_cache.get(key) for key in keys]
+        
+        # The first spelling of each missing key is the one encoded
+        missing: Dict[str, str] = {}
+        for query, key, embedding in zip(queries, keys, embeddings):
+            if embedding is None:
+                missing.setdefault(key, query)
+        if missing:
+            encoded = dict(zip(missing, self._encode(list(missing.values()))))
+            for key, embedding in encoded.items():
+                self._embedding_cache.put(key, embedding)
+            embeddings = [encoded.get(key) if embedding is None else embedding
+                          for key, embedding in zip(keys, embeddings)]
+        
+        return np.vstack(embeddings)
+    
+    def _result_key(self, query: str, k: int, filters: Optional[Dict] = None) -> Tuple:
+        filters = tuple(sorted((filters or {}).items()))
+        return (normalize_persian(query), k, filters, self._generation)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the query embedding and result caches.
+        
+        Returns:
+            Dict: Stats per cache plus the current index generation
+        """
+        return {
+            'embeddings': self._embedding_cache.stats(),
+            'results': self._result_cache.stats(),
+            'generation': self._generation
+        }
+    
+    def clear_caches(self):
+        """Drop all cached query embeddings and results."""
+        self._embedding_cache.clear()
+        self._result_cache.clear()
+    
+    def _filter_rows(self, filters: Dict) -> Optional[np.ndarray]:
+        """Rows allowed by the metadata filters, or None when nothing is filtered."""
+        filters = {name: value for name, value in filters.items() if value is not None}
+        if not filters:
+            return None
+        with self._lock:
+            return self.store.select(**filters)
+    
+    def _dense_rows(self, queries: List[str], k: int, rows: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """Nearest rows and L2 distances per query, from one encoder pass and one index scan.
+        
+        When rows is given, the scan only considers those rows.
+        """
+        if rows is not None and not len(rows):
+            return [[] for _ in queries]
+        
+        # Get query embeddings, encoding all cache misses in a single batch
+        query_embeddings = self._encode_queries(queries)
+        
+        # Search index
+        with self._lock:
+            params = None
+            if rows is not None:
+                params = filtered_search_params(self.index_config, self._index_kind[0], rows)
+            distances, indices = self.index.search(query_embeddings, k + self._stale, params=params)
+            return [
+                [(int(idx), float(distance)) for distance, idx in zip(row_distances, row_indices)
+                 if self.store.is_alive(idx)][:k]
+                for row_distances, row_indices in zip(distances, indices)
+            ]
+    
+    def _results(self, rows: List[Tuple[int, float]]) -> List[Dict]:
+        """Turn (row, score) pairs into result dicts, skipping rows removed meanwhile."""
+        with self._lock:
+            return [
+                {
+                    'text': self.store.text(row),
+                    'metadata': self.store.metadata(row),
+                    'score': score
+                }
+                for row, score in rows if self.store.is_alive(row)
+            ]
     
-    def search(self, query: str, k: int = 5) -> List[Dict]:
+    def search(self, query: str, k: int = 5, video_id: Optional[str] = None, start: Optional[float] = None,
+               end: Optional[float] = None, language: Optional[str] = None) -> List[Dict]:
         """Search for relevant context using the query.
         
+        Filters are applied inside the index scan, so the top k is taken over the
+        matching segments only rather than post-filtering a global top k.
+        
         Args:
             query (str): Query text
             k (int): Number of results to return
+            video_id (str): Only search this video
+            start (float): Only segments that end after this time (seconds)
+            end (float): Only segments that start before this time (seconds)
+            language (str): Only transcripts in this language (e.g. 'fa')
             
         Returns:
             List[Dict]: List of relevant segments with metadata
         """
-        # Get query embedding
-        query_embedding = self.model.encode([query])
+        return self.search_batch([query], k, video_id=video_id, start=start, end=end, language=language)[0]
+    
+    def search_batch(self, queries: List[str], k: int = 5, **filters) -> List[List[Dict]]:
+        """Search for several queries with one encoder pass and one index scan.
         
-        # Search index
-        distances, indices = self.index.search(
-            np.array(query_embedding).astype('float32'), 
-            k
-        )
-        
-        # Get results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.segments):
-                results.append({
-                    'text': self.segments[idx],
-                    'metadata': self.metadata[idx],
-                    'score': float(distances[0][i])
-                })
-        
-        return results
+        Args:
+            queries (List[str]): Query texts
+            k (int): Number of results to return per query
+            **filters: video_id, start, end and language, as for search()
+            
+        Returns:
+            List[List[Dict]]: One result list per query, as returned by search()
+        """
+        if not queries:
+            return []
+        rows = self._filter_rows(filters)
+        return [self._results(dense) for dense in self._dense_rows(queries, k, rows)]
+    
+    @property
+    def lexical_index(self) -> BM25Index:
+        """BM25 index over the live segments, built on first use and kept in sync after that."""
+        with self._lock:
+            if self._lexical is None:
+                self._lexical = BM25Index()
+                for row in range(len(self.store)):
+                    if self.store.is_alive(row):
+                        self._lexical.add(row, self.store.text(row))
+            return self._lexical
+    
+    def search_hybrid(self, query: str, k: int = 5, **filters) -> List[Dict]:
+        """Search with dense and BM25 retrieval fused by reciprocal rank.
+        
+        Args:
+            query (str): Query text
+            k (int): Number of results to return
+            **filters: video_id, start, end and language, as for search()
+            
+        Returns:
+            List[Dict]: Results as returned by search(), with the fused score
+                (higher is better) as 'score'
+        """
+        return self.search_hybrid_batch([query], k, **filters)[0]
+    
+    def search_hybrid_batch(self, queries: List[str], k: int = 5, **filters) -> List[List[Dict]]:
+        """Hybrid search for several queries; the dense side runs as one batch.
+        
+        Args:
+            queries (List[str]): Query texts
+            k (int): Number of results to return per query
+            **filters: video_id, start, end and language, as for search()
+            
+        Returns:
+            List[List[Dict]]: One result list per query, as returned by search_hybrid()
+        """
+        if not queries:
+            return []
+        
+        # Each retriever contributes a deeper candidate list than the final k
+        candidates = k * 4
+        rows = self._filter_rows(filters)
+        allowed = None if rows is None else set(rows.tolist())
+        dense = self._dense_rows(queries, candidates, rows)
+        lexical = self.lexical_index
+        
+        batch_results = []
+        for query, dense_rows in zip(queries, dense):
+            with self._lock:
+                lexical_rows = lexical.search(query, candidates, allowed)
+            fused = reciprocal_rank_fusion(
+                [[row for row, _ in dense_rows], [row for row, _ in lexical_rows]], k
+            )
+            batch_results.append(self._results(fused))
+        return batch_results
+    
+    def _fast_path(self, query: str, k: int, allowed: Optional[set] = None) -> Optional[Dict]:
+        """Answer a single-word lookup from the lexical index without either model.
+        
+        The answer is the best-matching segment rather than a model answer, so the
+        response is marked 'source': 'lexical', carries that segment's BM25 score
+        as 'score' and has a confidence of 0.0.
+        
+        Returns None when the query is not a single word or the word never occurs
+        in the allowed rows.
+        """
+        terms = tokenize(query)
+        if len(terms) != 1:
+            return None
+        
+        with self._lock:
+            rows = self.lexical_index.search(terms[0], k, allowed)
+        results = self._results(rows)
+        if not results:
+            return None
+        
+        return {
+            'context': results,
+            'response': {
+                'answer': results[0]['text'],
+                'confidence': 0.0,
+                'score': results[0]['score'],
+                'source': 'lexical',
+                'context': fit_context([r['text'] for r in results], self.context_tokens)
+            }
+        }
+    
+    def query_stats(self) -> Dict:
+        """How often uncached queries were answered by the lexical fast path.
+        
+        Returns:
+            Dict: Uncached query count, fast-path count and rate
+        """
+        return {
+            'queries': self._query_count,
+            'fast_path': self._fast_path_count,
+            'fast_path_rate': self._fast_path_count / self._query_count if self._query_count else 0.0
+        }
     
     def generate_response(self, query: str, context: str) -> Dict:
         """Generate a response using the question-answering model.
@@ -103,6 +661,9 @@ class RAGSystem:
         Returns:
             Dict: Model response with answer and confidence score
         """
+        if self.retrieval_only:
+            return self._retrieval_only_response(context)
+        
         try:
             result = self.qa_pipeline(
                 question=query,
@@ -123,35 +684,119 @@ class RAGSystem:
                 'context': context
             }
     
-    def query(self, query: str) -> Dict:
-        """Process a query through the RAG pipeline.
+    def generate_responses(self, queries: List[str], contexts: List[str], batch_size: int = 8) -> List[Dict]:
+        """Generate responses for several query/context pairs in pipeline batches.
         
         Args:
-            query (str): User query
+            queries (List[str]): User queries
+            contexts (List[str]): Retrieved context for each query
+            batch_size (int): Number of pairs per model forward pass
             
         Returns:
-            Dict: Response containing retrieved context and generated answer
+            List[Dict]: One response per query, as returned by generate_response()
         """
-        # Get relevant context
-        results = self.search(query)
+        if not queries:
+            return []
+        if self.retrieval_only:
+            return [self._retrieval_only_response(context) for context in contexts]
         
-        if not results:
-            return {
-                'context': [],
-                'response': {
-                    'answer': "I couldn't find any relevant information. Please try another question.",
-                    'confidence': 0.0,
-                    'context': ""
+        try:
+            outputs = self.qa_pipeline(
+                question=queries,
+                context=contexts,
+                max_answer_len=50,
+                batch_size=batch_size
+            )
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            
+            return [
+                {
+                    'answer': result['answer'],
+                    'confidence': float(result['score']),
+                    'context': context
                 }
+                for result, context in zip(outputs, contexts)
+            ]
+        except Exception as e:
+            # Fall back to one call per pair so a single bad input does not fail the batch
+            print(f"Error generating batched responses: {str(e)}")
+            return [self.generate_response(q, c) for q, c in zip(queries, contexts)]
+    
+    def _no_results_response(self) -> Dict:
+        return {
+            'context': [],
+            'response': {
+                'answer': "I couldn't find any relevant information. Please try another question.",
+                'confidence': 0.0,
+                'context': ""
             }
+        }
+    
+    def query(self, query: str, **filters) -> Dict:
+        """Process a query through the RAG pipeline.
         
-        # Combine context
-        context = " ".join([r['text'] for r in results])
+        Args:
+            query (str): User query
+            **filters: video_id, start, end and language, as for search()
+            
+        Returns:
+            Dict: Response containing retrieved context and generated answer. With
+                hybrid retrieval (the default) each context entry's 'score' is the
+                reciprocal-rank-fusion score, where higher is better; with
+                hybrid=False it is the L2 distance from search(), where lower is
+                better. Single-word lookups answered from the lexical index carry
+                BM25 scores and a response marked 'source': 'lexical'.
+        """
+        return self.query_batch([query], **filters)[0]
+    
+    def query_batch(self, queries: List[str], k: int = 5, batch_size: int = 8, **filters) -> List[Dict]:
+        """Process several queries through the RAG pipeline in batches.
         
-        # Generate response
-        response = self.generate_response(query, context)
+        Cached results are returned directly. With hybrid retrieval, single-word
+        lookups are answered from the lexical index; the remaining queries are
+        retrieved in one batch and answered by the QA model in batches.
         
-        return {
-            'context': results,
-            'response': response
-        }
+        Args:
+            queries (List[str]): User queries
+            k (int): Number of context segments per query
+            batch_size (int): Number of queries per QA model forward pass
+            **filters: video_id, start, end and language, as for search()
+            
+        Returns:
+            List[Dict]: One result per query, as returned by query()
+        """
+        filters = {name: value for name, value in filters.items() if value is not None}
+        keys = [self._result_key(q, k, filters) for q in queries]
+        output = [self._result_cache.get(key) for key in keys]
+        output = [copy.deepcopy(result) if result is not None else None for result in output]
+        pending = [i for i, result in enumerate(output) if result is None]
+        self._query_count += len(pending)
+        
+        if self.hybrid:
+            rows = self._filter_rows(filters)
+            allowed = None if rows is None else set(rows.tolist())
+            for i in pending:
+                output[i] = self._fast_path(queries[i], k, allowed)
+                if output[i] is not None:
+                    self._fast_path_count += 1
+                    self._result_cache.put(keys[i], copy.deepcopy(output[i]))
+            pending = [i for i in pending if output[i] is None]
+            batch_results = self.search_hybrid_batch([queries[i] for i in pending], k, **filters)
+        else:
+            batch_results = self.search_batch([queries[i] for i in pending], k, **filters)
+        
+        # Only queries with context go through the QA model
+        answerable = [(i, results) for i, results in zip(pending, batch_results) if results]
+        contexts = [fit_context([r['text'] for r in results], self.context_tokens) for _, results in answerable]
+        responses = self.generate_responses([queries[i] for i, _ in answerable], contexts, batch_size)
+        
+        for i in pending:
+            output[i] = self._no_results_response()
+        for (i, results), response in zip(answerable, responses):
+            output[i] = {
+                'context': results,
+                'response': response
+            }
+            self._result_cache.put(keys[i], copy.deepcopy(output[i]))
+        return output
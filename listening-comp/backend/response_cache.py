@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+def response_key(model_id: str, prompt: str, transcript: str, inference_config: Optional[Dict] = None) -> str:
+    """Content address of one model call: the same model, settings, prompt and transcript give the same key."""
+    transcript_hash = hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+    canonical = json.dumps([model_id, inference_config or {}, prompt, transcript_hash],
+                           sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        """Disk-backed cache of model responses, addressed by response_key().
+
+        Each response is one UTF-8 file named after its key. Reads refresh the file's
+        mtime, and when the files outgrow max_bytes the least recently used ones are
+        deleted. Only deterministic calls (temperature 0) should be cached.
+
+        Args:
+            cache_dir (str): Directory holding the response files
+            max_bytes (int): Total size the cache is trimmed back to; 0 disables it
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        if os.path.isdir(cache_dir):
+            for filename in os.listdir(cache_dir):
+                if filename.endswith('.txt'):
+                    self._sizes[filename[:-4]] = os.path.getsize(os.path.join(cache_dir, filename))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response and mark it as recently used, or None."""
+        if self.max_bytes <= 0:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                response = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, response: str):
+        if self.max_bytes <= 0:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = response.encode('utf-8')
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._sizes[key] = len(data)
+            if sum(self._sizes.values()) > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used responses until the cache fits in max_bytes."""
+        by_age = []
+        for key in list(self._sizes):
+            try:
+                by_age.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                self._sizes.pop(key, None)
+        total = sum(self._sizes.values())
+        for _, key in sorted(by_age):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._sizes):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._sizes.clear()
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and disk usage."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._sizes),
+            'bytes': sum(self._sizes.values()),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,130 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class SegmentStore:
+    def __init__(self, capacity: int = 1024):
+        """Columnar store for transcript segments, addressed by row id.
+
+        Segment text lives in one UTF-8 buffer with an offsets array, video ids,
+        titles and languages are interned in a small table, and timestamps are numpy
+        columns that metadata filters evaluate in bulk. Rows are never reused:
+        removing a row only clears its alive flag, so row ids stay valid as index ids.
+
+        Args:
+            capacity (int): Initial number of rows to allocate
+        """
+        self._size = 0
+        self._text = bytearray()
+        self._offsets = np.zeros(capacity + 1, dtype='int64')
+        self._video = np.zeros(capacity, dtype='int32')
+        self._start = np.zeros(capacity, dtype='float64')
+        self._duration = np.zeros(capacity, dtype='float32')
+        self._alive = np.zeros(capacity, dtype='bool')
+
+        # Interned (video_id, title, language) tuples; one per video in practice
+        self._videos: List[tuple] = []
+        self._video_codes: Dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def live_count(self) -> int:
+        return int(self._alive[:self._size].sum())
+
+    def _reserve(self, rows: int):
+        """Grow the columns geometrically so appends are amortized O(1)."""
+        needed = self._size + rows
+        capacity = len(self._video)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._offsets = np.resize(self._offsets, capacity + 1)
+        self._video = np.resize(self._video, capacity)
+        self._start = np.resize(self._start, capacity)
+        self._duration = np.resize(self._duration, capacity)
+        alive = np.zeros(capacity, dtype='bool')
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _intern(self, video_id: str, title: str, language: Optional[str]) -> int:
+        key = (video_id, title, language)
+        code = self._video_codes.get(key)
+        if code is None:
+            code = len(self._videos)
+            self._videos.append(key)
+            self._video_codes[key] = code
+        return code
+
+    def append(self, segments: List[Dict]) -> np.ndarray:
+        """Append segment records ({'text', 'metadata'}) and return their row ids."""
+        self._reserve(len(segments))
+        first = self._size
+        for segment in segments:
+            row = self._size
+            metadata = segment['metadata']
+            self._text += segment['text'].encode('utf-8')
+            self._offsets[row + 1] = len(self._text)
+            self._video[row] = self._intern(metadata['video_id'], metadata['title'], metadata.get('language'))
+            self._start[row] = metadata.get('start', 0)
+            self._duration[row] = metadata.get('duration', 0)
+            self._alive[row] = True
+            self._size += 1
+        return np.arange(first, self._size, dtype='int64')
+
+    def remove(self, ids: np.ndarray):
+        """Mark rows as removed."""
+        self._alive[ids] = False
+
+    def is_alive(self, row: int) -> bool:
+        return 0 <= row < self._size and bool(self._alive[row])
+
+    def text(self, row: int) -> str:
+        return self._text[self._offsets[row]:self._offsets[row + 1]].decode('utf-8')
+
+    def video_id(self, row: int) -> str:
+        return self._videos[self._video[row]][0]
+
+    def metadata(self, row: int) -> Dict:
+        video_id, title, language = self._videos[self._video[row]]
+        return {
+            'video_id': video_id,
+            'title': title,
+            'language': language,
+            'start': float(self._start[row]),
+            'duration': float(self._duration[row])
+        }
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store, excluding Python object overhead of the video table."""
+        columns = (self._offsets, self._video, self._start, self._duration, self._alive)
+        interned = sum(len(v.encode('utf-8')) + len(t.encode('utf-8')) for v, t, _ in self._videos)
+        return len(self._text) + sum(c.nbytes for c in columns) + interned
+
+    def select(self, video_id: Optional[str] = None, start: Optional[float] = None,
+               end: Optional[float] = None, language: Optional[str] = None) -> np.ndarray:
+        """Live rows matching every given filter.
+
+        Args:
+            video_id (str): Only segments of this video
+            start (float): Only segments that end after this time (seconds)
+            end (float): Only segments that start before this time (seconds)
+            language (str): Only segments of transcripts in this language
+
+        Returns:
+            np.ndarray: Matching row ids, ascending
+        """
+        mask = self._alive[:self._size].copy()
+        if video_id is not None or language is not None:
+            codes = [
+                code for code, (vid, _, lang) in enumerate(self._videos)
+                if (video_id is None or vid == video_id) and (language is None or lang == language)
+            ]
+            mask &= np.isin(self._video[:self._size], codes)
+        if start is not None:
+            mask &= self._start[:self._size] + self._duration[:self._size] > start
+        if end is not None:
+            mask &= self._start[:self._size] < end
+        return np.flatnonzero(mask).astype('int64')
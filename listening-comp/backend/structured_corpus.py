@@ -0,0 +1,146 @@
+"""Process many transcripts into one merged StructuredDataProcessor with a process pool.
+
+Each worker process extracts dialogues, vocabulary and grammar from whole
+transcript files (downloaded .json or JSON Lines segments) and sends the results
+back; the parent merges them in file order into a single processor with
+de-duplicated vocabulary and grammar indexes, where every word position names
+the transcript it came from. Per-file timings are reported and the corpus can be
+exported as JSON or columnar .npz.
+
+    python -m backend.structured_corpus --data-dir backend/data/transcripts --workers 4 --output corpus.npz
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from backend.structured_data import StructuredDataProcessor, iter_jsonl_segments
+
+TRANSCRIPT_EXTENSIONS = ('.json', '.jsonl')
+
+
+def transcript_files(data_dir: str) -> List[str]:
+    """Transcript files in data_dir, in name order."""
+    return [
+        os.path.join(data_dir, filename) for filename in sorted(os.listdir(data_dir))
+        if filename.endswith(TRANSCRIPT_EXTENSIONS)
+    ]
+
+
+def source_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _process_file(path: str) -> Tuple[Optional[StructuredDataProcessor], float, Optional[str]]:
+    """Extract one transcript in a worker process.
+
+    Returns:
+        Tuple: (processor holding the transcript's results, seconds, error message)
+    """
+    start = time.perf_counter()
+    processor = StructuredDataProcessor()
+    try:
+        if path.endswith('.jsonl'):
+            processor.dialogues = list(processor.iter_dialogues(iter_jsonl_segments(path), max_grammar_examples=None,
+                                                                 track_positions=True))
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = processor.process_transcript(json.load(f), track_positions=True)
+            if 'error' in stats:
+                return None, time.perf_counter() - start, stats['error']
+    except Exception as e:
+        return None, time.perf_counter() - start, str(e)
+    return processor, time.perf_counter() - start, None
+
+
+def process_corpus(paths: List[str], workers: Optional[int] = None,
+                   keep_dialogues: bool = True) -> Tuple[StructuredDataProcessor, List[Dict]]:
+    """Extract every transcript in a process pool and merge the results.
+
+    Args:
+        paths (List[str]): Transcript files (.json as downloaded, or .jsonl segments)
+        workers (int): Worker processes, defaults to the number of CPUs
+        keep_dialogues (bool): Keep every transcript's dialogues in the corpus; turn
+            off when only the vocabulary and grammar indexes are needed
+
+    Returns:
+        Tuple: (merged processor, one report per file with source, seconds spent
+            extracting in the worker, merge_seconds, dialogues, vocabulary,
+            new_words, grammar_points and error)
+    """
+    corpus = StructuredDataProcessor()
+    reports = []
+    if not paths:
+        return corpus, reports
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = [pool.submit(_process_file, path) for path in paths]
+        # Merged in file order so the corpus does not depend on which worker finishes first
+        for path, future in zip(paths, futures):
+            report = {'source': source_name(path), 'path': path}
+            try:
+                processor, seconds, error = future.result()
+            except Exception as e:
+                processor, seconds, error = None, 0.0, str(e)
+            report['seconds'] = seconds
+            if error is not None:
+                report['error'] = error
+                print(f"Error processing {path}: {error}")
+                reports.append(report)
+                continue
+
+            if not keep_dialogues:
+                processor.dialogues = []
+            start = time.perf_counter()
+            new_words = corpus.merge(processor, report['source'])
+            report.update({
+                'merge_seconds': time.perf_counter() - start,
+                'dialogues': len(processor.dialogues),
+                'vocabulary': len(processor.vocabulary),
+                'new_words': new_words,
+                'grammar_points': len(processor.grammar_points),
+                'error': None
+            })
+            reports.append(report)
+    return corpus, reports
+
+
+def print_reports(corpus: StructuredDataProcessor, reports: List[Dict], seconds: float):
+    print(f"\n{'source':<24}{'seconds':>9}{'merge ms':>10}{'dialogues':>11}{'words':>8}{'new':>7}{'grammar':>9}")
+    for report in reports:
+        if report['error']:
+            print(f"{report['source']:<24}{report['seconds']:>9.2f}  failed: {report['error']}")
+            continue
+        print(f"{report['source']:<24}{report['seconds']:>9.2f}{report['merge_seconds'] * 1000:>10.1f}"
+              f"{report['dialogues']:>11}{report['vocabulary']:>8}{report['new_words']:>7}"
+              f"{report['grammar_points']:>9}")
+    failed = sum(1 for report in reports if report['error'])
+    print(f"\n{len(reports) - failed} transcripts merged, {failed} failed in {seconds:.1f}s: "
+          f"{len(corpus.dialogues)} dialogues, {len(corpus.vocabulary)} words, "
+          f"{len(corpus.grammar_points)} grammar points")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default="backend/data/transcripts")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help="Export the corpus here (.npz for the columnar format)")
+    parser.add_argument('--no-dialogues', action='store_true', help="Only merge vocabulary and grammar")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus, reports = process_corpus(transcript_files(args.data_dir), args.workers, not args.no_dialogues)
+    print_reports(corpus, reports, time.perf_counter() - start)
+    if args.output:
+        corpus.export_data(args.output)
+        print(f"Exported corpus to {args.output}")
+    if any(report['error'] for report in reports):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
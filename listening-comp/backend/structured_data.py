@@ -1,20 +1,170 @@
-from typing import Optional, Dict, List
-import boto3
+from typing import Callable, Optional, Dict, Iterable, Iterator, List, Tuple
 import os
 import json
+import math
 import re
-from dataclasses import dataclass
+import time
+import heapq
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from dataclasses import dataclass, field
 from datetime import datetime
+import numpy as np
+from backend.chunker import TOKENS_PER_WORD, token_windows
+from backend.columnar import (is_columnar_file, json_column, open_columns, read_json_column, read_string_column,
+                              string_column, write_columns)
+from backend.persian_text import normalize_persian
+from backend.response_cache import ResponseCache, response_key
 
 # Model ID
 #MODEL_ID = "amazon.nova-micro-v1:0"
 MODEL_ID = "amazon.nova-lite-v1:0"
 
+# Sections extracted by structure_transcript; section 1 is skipped for now
+SECTIONS = (2, 3)
+
+# Deterministic settings, which is what makes responses safe to cache
+INFERENCE_CONFIG = {"temperature": 0}
+
+# Bedrock error codes worth retrying; botocore connection errors and read
+# timeouts are retried as well, anything else (e.g. a malformed response) is not
+RETRYABLE_ERRORS = {
+    'ThrottlingException', 'ServiceUnavailableException', 'InternalServerException',
+    'ModelTimeoutException', 'ModelNotReadyException'
+}
+
+def _transient_errors() -> tuple:
+    try:
+        from botocore.exceptions import ConnectionError, ReadTimeoutError
+        return ConnectionError, ReadTimeoutError
+    except ImportError:
+        return ()
+
+def _is_retryable(error: Exception) -> bool:
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = (response.get('Error') or {}).get('Code')
+        if code is not None:
+            return code in RETRYABLE_ERRORS
+    return isinstance(error, _transient_errors())
+
+QUESTION_BLOCK = re.compile(r'<question>.*?</question>', re.DOTALL)
+
+def merge_question_blocks(outputs: List[str]) -> str:
+    """Join the <question> blocks of several chunk outputs, dropping repeats from chunk overlaps"""
+    seen = set()
+    blocks = []
+    for output in outputs:
+        for block in QUESTION_BLOCK.findall(output or ""):
+            key = normalize_persian(block)
+            if key not in seen:
+                seen.add(key)
+                blocks.append(block)
+    return "\n\n".join(blocks)
+
+# Japanese and Chinese text has no spaces; LLM tokenizers spend about one token per character
+_CJK = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uff00-\uffef]')
+
+# Section headers of JLPT-style listening transcripts, e.g. 問題2
+SECTION_MARKER = re.compile(r'問題\s*[0-9０-９]')
+
+def approx_prompt_tokens(text: str) -> int:
+    """Token estimate for LLM prompts that may mix Persian words and CJK characters"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil(len(_CJK.sub(' ', text).split()) * TOKENS_PER_WORD)
+
+def split_transcript_text(transcript: str, max_tokens: int = 6000, overlap_tokens: int = 300,
+                          count_tokens: Optional[Callable[[str], int]] = None) -> List[str]:
+    """Split a long plain-text transcript into chunks that fit a prompt token budget.
+
+    Chunk boundaries fall on section markers (問題N) where possible: whole sections
+    are packed together while they fit. A section longer than the budget is cut
+    into line windows that overlap by overlap_tokens, each repeating the section's
+    marker line so the model knows which section it is reading. A transcript that
+    fits the budget comes back unchanged as a single chunk.
+
+    Args:
+        transcript (str): Transcript text, one caption per line
+        max_tokens (int): Token budget per chunk
+        overlap_tokens (int): Tokens a window repeats from the previous one
+        count_tokens (Callable): Token counter, defaults to approx_prompt_tokens
+
+    Returns:
+        List[str]: Chunks in transcript order
+    """
+    count_tokens = count_tokens or approx_prompt_tokens
+    if count_tokens(transcript) <= max_tokens:
+        return [transcript]
+
+    # Sections start at marker lines; anything before the first marker is its own block
+    blocks = [[]]
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        if SECTION_MARKER.search(line) and blocks[-1]:
+            blocks.append([])
+        blocks[-1].append(line)
+
+    pieces = []
+    for block in blocks:
+        if sum(count_tokens(line) for line in block) <= max_tokens:
+            pieces.append(block)
+        else:
+            header = block[:1] if SECTION_MARKER.search(block[0]) else []
+            # The marker line is repeated in every window of the section
+            lines = block[len(header):]
+            budget = max_tokens - sum(count_tokens(line) for line in header)
+            windows = token_windows(lines, [count_tokens(line) for line in lines], budget, overlap_tokens)
+            pieces.extend(header + window for window in windows)
+
+    chunks = []
+    current = []
+    used = 0
+    for piece in pieces:
+        size = sum(count_tokens(line) for line in piece)
+        if current and used + size > max_tokens:
+            chunks.append("\n".join(current))
+            current = []
+            used = 0
+        current.extend(piece)
+        used += size
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
 class TranscriptStructurer:
-    def __init__(self, model_id: str = MODEL_ID):
-        """Initialize Bedrock client"""
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name="us-east-1")
+    def __init__(self, model_id: str = MODEL_ID, bedrock_client=None, max_concurrency: int = 4,
+                 cache_dir: str = "backend/data/bedrock_cache", cache_max_bytes: int = 64 * 1024 * 1024,
+                 use_cache: bool = True, chunk_tokens: int = 6000, chunk_overlap: int = 300,
+                 max_retries: int = 3, backoff_base: float = 1.0):
+        """Initialize Bedrock client
+
+        Any object with a converse() method can stand in for the client, e.g.
+        FakeBedrockClient from backend/fake_bedrock.py. At most max_concurrency
+        Bedrock calls from this structurer are in flight at once. Responses are
+        cached on disk by model id, prompt and transcript hash; use_cache=False
+        bypasses the cache. Transcripts longer than chunk_tokens are split into
+        overlapping chunks along section markers (see split_transcript_text).
+        Throttling and transient errors are retried up to max_retries times with
+        exponential backoff starting at backoff_base seconds.
+        """
+        if bedrock_client is None:
+            import boto3
+            bedrock_client = boto3.client('bedrock-runtime', region_name="us-east-1")
+        self.bedrock_client = bedrock_client
         self.model_id = model_id
+        self.max_concurrency = max_concurrency
+        self._bedrock_slots = threading.BoundedSemaphore(max_concurrency)
+        self.use_cache = use_cache
+        self.response_cache = ResponseCache(cache_dir, cache_max_bytes)
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.retry_count = 0
+        self._retry_lock = threading.Lock()
         self.prompts = {
             1: """Extract questions from section 問題1 of this JLPT transcript where the answer can be determined solely from the conversation without needing visual aids.
             
@@ -124,8 +274,15 @@ class TranscriptStructurer:
             """
         }
 
-    def _invoke_bedrock(self, prompt: str, transcript: str) -> Optional[str]:
-        """Make a single call to Bedrock with the given prompt"""
+    def _invoke_bedrock(self, prompt: str, transcript: str, use_cache: Optional[bool] = None) -> Optional[str]:
+        """Make a single call to Bedrock with the given prompt, unless the response is cached"""
+        use_cache = self.use_cache if use_cache is None else use_cache
+        key = response_key(self.model_id, prompt, transcript, INFERENCE_CONFIG)
+        if use_cache:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        
         full_prompt = f"{prompt}\n\nHere's the transcript:\n{transcript}"
         
         messages = [{
@@ -133,23 +290,64 @@ class TranscriptStructurer:
             "content": [{"text": full_prompt}]
         }]
 
+        attempt = 0
+        while True:
+            try:
+                with self._bedrock_slots:
+                    response = self.bedrock_client.converse(
+                        modelId=self.model_id,
+                        messages=messages,
+                        inferenceConfig=INFERENCE_CONFIG
+                    )
+                text = response['output']['message']['content'][0]['text']
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    print(f"Error invoking Bedrock: {str(e)}")
+                    return None
+                # Exponential backoff with jitter, outside the concurrency slot
+                delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.0)
+                attempt += 1
+                with self._retry_lock:
+                    self.retry_count += 1
+                time.sleep(delay)
+        
+        # Refreshed even when bypassed, so a forced re-run updates the cache
         try:
-            response = self.bedrock_client.converse(
-                modelId=self.model_id,
-                messages=messages,
-                inferenceConfig={"temperature": 0}
-            )
-            return response['output']['message']['content'][0]['text']
+            self.response_cache.put(key, text)
         except Exception as e:
-            print(f"Error invoking Bedrock: {str(e)}")
-            return None
-
-    def structure_transcript(self, transcript: str) -> Dict[int, str]:
-        """Structure the transcript into three sections using separate prompts"""
+            print(f"Error caching Bedrock response: {str(e)}")
+        return text
+
+    def structure_transcript(self, transcript: str, use_cache: Optional[bool] = None,
+                             raise_on_error: bool = False) -> Dict[int, str]:
+        """Structure the transcript into sections, running every section prompt on every chunk concurrently
+
+        With raise_on_error, a Bedrock call that still fails after retries raises
+        RuntimeError instead of leaving its section out.
+        """
+        chunks = split_transcript_text(transcript, self.chunk_tokens, self.chunk_overlap)
+        tasks = [(section_num, chunk) for section_num in SECTIONS for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tasks))) as pool:
+            futures = [
+                pool.submit(self._invoke_bedrock, self.prompts[section_num], chunk, use_cache)
+                for section_num, chunk in tasks
+            ]
+        
+        # Merge in section and chunk order, whatever order the calls finished in
+        outputs = {section_num: [] for section_num in SECTIONS}
+        for (section_num, _), future in zip(tasks, futures):
+            result = future.result()
+            if result is None and raise_on_error:
+                raise RuntimeError(f"Bedrock call for section {section_num} failed")
+            outputs[section_num].append(result)
+        
         results = {}
-        # Skipping section 1 for now
-        for section_num in range(2, 4):
-            result = self._invoke_bedrock(self.prompts[section_num], transcript)
+        for section_num in SECTIONS:
+            if len(chunks) == 1:
+                result = outputs[section_num][0]
+            else:
+                result = merge_question_blocks(outputs[section_num])
             if result:
                 results[section_num] = result
         return results
@@ -171,9 +369,12 @@ class TranscriptStructurer:
             return False
 
     def load_transcript(self, filename: str) -> Optional[str]:
-        """Load transcript from a file"""
+        """Load transcript from a file; downloaded .json transcripts become one caption per line"""
         try:
             with open(filename, 'r', encoding='utf-8') as f:
+                if filename.endswith('.json'):
+                    data = json.load(f)
+                    return "\n".join(segment.get('text', '') for segment in data.get('transcript', []))
                 return f.read()
         except Exception as e:
             print(f"Error loading transcript: {str(e)}")
@@ -203,11 +404,64 @@ class GrammarPoint:
     examples: List[Dict[str, str]]  # Each example has persian, english, transliteration
     level: str
 
+# Runs of Persian characters, treated as words
+PERSIAN_WORD = re.compile(r'[\u0600-\u06FF]+')
+
+# Keywords that usually open a new topic
+TOPIC_CHANGE = re.compile('|'.join(['خب', 'حالا', 'بنابراین', 'پس', 'در نتیجه']))
+
+# (name, pattern, anchored at the end of the text)
+GRAMMAR_PATTERNS = [
+    ('present_tense', re.compile(r'می‌?[خ|ر|گ|ش|ن]'), False),
+    ('past_tense', re.compile(r'[خ|ر|گ|ش|ن]د$'), True),
+    ('future_tense', re.compile(r'خواه'), False),
+    ('plural', re.compile(r'ها$'), True),
+    ('possession', re.compile(r'[م|ت|ش|مان|تان|شان]$'), True)
+]
+
+# Characters an end-anchored pattern can span: two letters plus a trailing newline
+SUFFIX_WINDOW = 3
+
+# Sections export_data writes and import_data can load on their own
+EXPORT_SECTIONS = ('dialogues', 'vocabulary', 'grammar_points')
+
+# Source name merge() gives a processor's own transcript
+SELF_SOURCE = "<self>"
+
+# Silence between segments, in seconds, that ends a dialogue
+PAUSE_SECONDS = 2
+
+def iter_jsonl_segments(path: str) -> Iterator[Dict]:
+    """Read transcript segments one per line from a JSON Lines file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error reading {path} line {line_num}: {str(e)}")
+
+@dataclass
+class WordOccurrences:
+    item: VocabularyItem
+    count: int = 0  # Every occurrence, including repeats within a segment
+    segments: array = field(default_factory=lambda: array('q'))  # Offsets of the segments containing the word
+    timestamps: array = field(default_factory=lambda: array('d'))  # Start times of those segments
+    sources: array = field(default_factory=lambda: array('i'))  # Index into sources per segment, for merged corpora
+
 class StructuredDataProcessor:
     def __init__(self):
         self.dialogues: List[List[DialogueTurn]] = []
         self.vocabulary: List[VocabularyItem] = []
         self.grammar_points: List[GrammarPoint] = []
+        self.grammar_counts: Dict[str, int] = {}
+        # Word -> frequency and positions, plus vocabulary bucketed by level
+        self.word_index: Dict[str, WordOccurrences] = {}
+        self.vocabulary_levels: Dict[str, List[VocabularyItem]] = {}
+        # Transcripts merged into this processor (see merge), and the grammar points already held
+        self.sources: List[str] = []
+        self._grammar_keys: set = set()
         
         # Common Persian patterns
         self.patterns = {
@@ -217,8 +471,13 @@ class StructuredDataProcessor:
             'numbers': r'[۰-۹]+|یک|دو|سه|چهار|پنج|شش|هفت|هشت|نه|ده'
         }
 
-    def process_transcript(self, transcript_data: List[Dict]) -> Dict:
-        """Process transcript data into structured format"""
+    def process_transcript(self, transcript_data: List[Dict], track_positions: bool = False) -> Dict:
+        """Process transcript data into structured format
+
+        Only word frequencies are indexed by default. Filing every word's segment
+        positions costs about as much as the single-pass extraction saves, so pass
+        track_positions=True only when word_occurrences will be read.
+        """
         try:
             # Ensure transcript_data is properly formatted
             if isinstance(transcript_data, str):
@@ -238,48 +497,10 @@ class StructuredDataProcessor:
             if not isinstance(transcript_data, list):
                 raise ValueError("Transcript data must be a list of entries")
 
-            # Reset existing data
-            self.dialogues = []
-            self.vocabulary = []
-            self.grammar_points = []
-            
-            # Extract dialogues
-            current_dialogue = []
-            for entry in transcript_data:
-                if not isinstance(entry, dict):
-                    if isinstance(entry, str):
-                        # Simple string entry
-                        entry = {'text': entry}
-                    else:
-                        continue
-                    
-                text = entry.get('text', '')
-                if not text:  # Skip empty entries
-                    continue
-                    
-                turn = DialogueTurn(
-                    speaker="Speaker",  # You might want to add speaker detection
-                    text=text,
-                    timestamp=float(entry.get('start', 0.0)),
-                    translation=entry.get('translation', None)
-                )
-                current_dialogue.append(turn)
-                
-                # If we detect a natural dialogue break (e.g., long pause or topic change)
-                if self._is_dialogue_break(entry):
-                    if current_dialogue:
-                        self.dialogues.append(current_dialogue)
-                        current_dialogue = []
-            
-            # Add any remaining dialogue
-            if current_dialogue:
-                self.dialogues.append(current_dialogue)
-            
-            # Extract vocabulary
-            self._extract_vocabulary(transcript_data)
-            
-            # Extract grammar points
-            self._extract_grammar_points(transcript_data)
+            # One pass emits dialogues, vocabulary and grammar hits together,
+            # replacing the previous transcript's data
+            self.dialogues = list(self.iter_dialogues(transcript_data, max_grammar_examples=None,
+                                                     track_positions=track_positions))
             
             return {
                 'dialogues': len(self.dialogues),
@@ -294,81 +515,132 @@ class StructuredDataProcessor:
             traceback.print_exc()
             return {'error': str(e)}
 
-    def _is_dialogue_break(self, entry: Dict) -> bool:
+    def iter_dialogues(self, segments: Iterable, max_grammar_examples: Optional[int] = 20,
+                       track_positions: bool = False) -> Iterator[List[DialogueTurn]]:
+        """Yield dialogues as they close, reading segments lazily
+
+        Segments can come from any iterable, e.g. iter_jsonl_segments(). Pauses are
+        measured against the next segment, so only one segment is held back, and
+        dialogues are handed to the caller instead of being kept. Vocabulary is
+        still collected (one item per distinct word), as are the first
+        max_grammar_examples hits of each grammar pattern; grammar_counts counts
+        every hit. Pass max_grammar_examples=None to keep all grammar hits.
+
+        word_index is built as segments arrive: each word's frequency and, with
+        track_positions=True, the offset and start time of every segment it occurs
+        in. Positions grow with the transcript, so they are off by default to keep
+        streaming memory flat.
+        """
+        self.vocabulary = []
+        self.grammar_points = []
+        self.grammar_counts = {name: 0 for name, _, _ in GRAMMAR_PATTERNS}
+        self.word_index = {}
+        self.vocabulary_levels = {}
+        self.sources = []
+        self._grammar_keys = set()
+        current_dialogue = []
+
+        entries = self._text_entries(segments)
+        offset, entry = next(entries, (None, None))
+        while entry is not None:
+            # One-segment lookahead for the pause after this entry
+            next_offset, next_entry = next(entries, (None, None))
+            turn = DialogueTurn(
+                speaker="Speaker",  # You might want to add speaker detection
+                text=entry['text'],
+                timestamp=float(entry.get('start', 0.0)),
+                translation=entry.get('translation', None)
+            )
+            current_dialogue.append(turn)
+            self._extract_entry(entry, offset, turn.timestamp, max_grammar_examples, track_positions)
+
+            # If we detect a natural dialogue break (e.g., long pause or topic change)
+            if self._is_dialogue_break(entry, next_entry):
+                yield current_dialogue
+                current_dialogue = []
+            offset, entry = next_offset, next_entry
+
+        # Yield any remaining dialogue
+        if current_dialogue:
+            yield current_dialogue
+
+    @staticmethod
+    def _text_entries(segments: Iterable) -> Iterator[Tuple[int, Dict]]:
+        """(offset, segment) pairs with segments as dicts, skipping entries without text"""
+        for offset, entry in enumerate(segments):
+            if not isinstance(entry, dict):
+                if isinstance(entry, str):
+                    # Simple string entry
+                    entry = {'text': entry}
+                else:
+                    continue
+            if entry.get('text'):  # Skip empty entries
+                yield offset, entry
+
+    def _is_dialogue_break(self, entry: Dict, next_entry: Optional[Dict] = None) -> bool:
         """Detect natural breaks in dialogue"""
         try:
-            # Consider a break if there's a long pause (> 2 seconds)
+            # Consider a break if there's a long pause before the next segment
             current_end = float(entry.get('start', 0)) + float(entry.get('duration', 0))
-            next_start = float(entry.get('next_start', current_end))
-            if next_start - current_end > 2:
+            if next_entry is not None and 'start' in next_entry:
+                next_start = float(next_entry['start'])
+            else:
+                next_start = float(entry.get('next_start', current_end))
+            if next_start - current_end > PAUSE_SECONDS:
                 return True
             
             # Or if we detect a topic change through keywords
-            text = str(entry.get('text', '')).lower()
-            topic_change_markers = ['خب', 'حالا', 'بنابراین', 'پس', 'در نتیجه']
-            return any(marker in text for marker in topic_change_markers)
+            return TOPIC_CHANGE.search(str(entry.get('text', ''))) is not None
         except Exception:
             return False
 
-    def _extract_vocabulary(self, transcript_data: List[Dict]):
-        """Extract vocabulary items from transcript"""
-        seen_words = set()
-        
-        for entry in transcript_data:
-            if not isinstance(entry, dict):
-                continue
-                
-            text = str(entry.get('text', ''))
-            if not text:
-                continue
-                
-            # Split text into words, handling Persian text properly
-            words = re.findall(r'[\u0600-\u06FF]+', text)  # Match Persian characters
-            
-            for word in words:
-                if word not in seen_words:
-                    vocab_item = VocabularyItem(
-                        persian=word,
-                        english="",  # Would need translation
-                        transliteration="",  # Would need transliteration
-                        pos="",  # Would need POS tagging
-                        example=text,  # Using current sentence as example
-                        level="beginner"  # Would need difficulty assessment
-                    )
-                    self.vocabulary.append(vocab_item)
-                    seen_words.add(word)
-
-    def _extract_grammar_points(self, transcript_data: List[Dict]):
-        """Extract grammar points from transcript"""
-        patterns = {
-            'present_tense': r'می‌?[خ|ر|گ|ش|ن]',
-            'past_tense': r'[خ|ر|گ|ش|ن]د$',
-            'future_tense': r'خواه',
-            'plural': r'ها$',
-            'possession': r'[م|ت|ش|مان|تان|شان]$'
-        }
-        
-        for entry in transcript_data:
-            if not isinstance(entry, dict):
-                continue
-                
-            text = str(entry.get('text', ''))
-            if not text:
-                continue
-                
-            for pattern_name, pattern in patterns.items():
-                if re.search(pattern, text):
-                    grammar_point = GrammarPoint(
-                        title=f"{pattern_name} usage",
-                        explanation=f"Example of {pattern_name} in Persian",
-                        examples=[{
-                            'persian': text,
-                            'english': str(entry.get('translation', '')),
-                            'transliteration': ''  # Would need transliteration
-                        }],
-                        level="beginner"  # Would need difficulty assessment
-                    )
-                    self.grammar_points.append(grammar_point)
+    def _extract_entry(self, entry: Dict, offset: int, timestamp: float, max_grammar_examples: Optional[int] = None,
+                       track_positions: bool = False):
+        """Index the entry's words and add its new vocabulary and grammar hits"""
+        text = str(entry.get('text', ''))
+        if not text:
+            return
+
+        # Split text into words, handling Persian text properly
+        word_index = self.word_index
+        for word in PERSIAN_WORD.findall(text):
+            occurrences = word_index.get(word)
+            if occurrences is None:
+                vocab_item = VocabularyItem(
+                    persian=word,
+                    english="",  # Would need translation
+                    transliteration="",  # Would need transliteration
+                    pos="",  # Would need POS tagging
+                    example=text,  # Using first sentence as example
+                    level="beginner"  # Would need difficulty assessment
+                )
+                self.vocabulary.append(vocab_item)
+                self.vocabulary_levels.setdefault(vocab_item.level, []).append(vocab_item)
+                occurrences = word_index[word] = WordOccurrences(vocab_item)
+            occurrences.count += 1
+            # A word repeated within a segment is listed there once
+            if track_positions and (not occurrences.segments or occurrences.segments[-1] != offset):
+                occurrences.segments.append(offset)
+                occurrences.timestamps.append(timestamp)
+
+        # Suffix patterns only need to look at the end of the text
+        tail_start = max(0, len(text) - SUFFIX_WINDOW)
+        for pattern_name, pattern, anchored in GRAMMAR_PATTERNS:
+            if pattern.search(text, tail_start if anchored else 0):
+                self.grammar_counts[pattern_name] += 1
+                if max_grammar_examples is not None and self.grammar_counts[pattern_name] > max_grammar_examples:
+                    continue
+                grammar_point = GrammarPoint(
+                    title=f"{pattern_name} usage",
+                    explanation=f"Example of {pattern_name} in Persian",
+                    examples=[{
+                        'persian': text,
+                        'english': str(entry.get('translation', '')),
+                        'transliteration': ''  # Would need transliteration
+                    }],
+                    level="beginner"  # Would need difficulty assessment
+                )
+                self.grammar_points.append(grammar_point)
 
     def get_dialogues(self, level: Optional[str] = None) -> List[List[DialogueTurn]]:
         """Get dialogues, optionally filtered by level"""
@@ -380,9 +652,99 @@ class StructuredDataProcessor:
     def get_vocabulary(self, level: Optional[str] = None) -> List[VocabularyItem]:
         """Get vocabulary items, optionally filtered by level"""
         if level:
-            return [v for v in self.vocabulary if v.level == level]
+            return self.vocabulary_levels.get(level, [])
         return self.vocabulary
 
+    def word_frequency(self, word: str) -> int:
+        """How often a word occurs in the transcript"""
+        occurrences = self.word_index.get(word)
+        return occurrences.count if occurrences else 0
+
+    def word_occurrences(self, word: str) -> List[Dict]:
+        """Every segment a word occurs in, as {'segment': offset, 'timestamp': start}
+
+        Empty unless the transcript was processed with track_positions=True. In a merged corpus each occurrence also names its 'source' transcript.
+        """
+        occurrences = self.word_index.get(word)
+        if not occurrences:
+            return []
+        if occurrences.sources:
+            return [{'source': self.sources[source], 'segment': segment, 'timestamp': timestamp}
+                    for source, segment, timestamp in zip(occurrences.sources, occurrences.segments,
+                                                          occurrences.timestamps)]
+        return [{'segment': segment, 'timestamp': timestamp}
+                for segment, timestamp in zip(occurrences.segments, occurrences.timestamps)]
+
+    def top_vocabulary(self, n: int = 20, level: Optional[str] = None) -> List[Tuple[VocabularyItem, int]]:
+        """The n most frequent vocabulary items with their counts, optionally for one level"""
+        items = self.get_vocabulary(level)
+        counts = ((item, self.word_frequency(item.persian)) for item in items)
+        return heapq.nlargest(n, counts, key=lambda pair: pair[1])
+
+    def _index_vocabulary(self):
+        """Rebuild the level buckets and word index after vocabulary is replaced"""
+        self.vocabulary_levels = {}
+        for item in self.vocabulary:
+            self.vocabulary_levels.setdefault(item.level, []).append(item)
+        self.word_index = {
+            item.persian: self.word_index.get(item.persian) or WordOccurrences(item)
+            for item in self.vocabulary
+        }
+
+    @staticmethod
+    def _grammar_key(point: GrammarPoint) -> tuple:
+        return point.title, tuple(tuple(sorted(example.items())) for example in point.examples)
+
+    def merge(self, other: 'StructuredDataProcessor', source: str) -> int:
+        """Add one transcript's results to this processor, which then holds a corpus
+
+        Dialogues are appended. Vocabulary is de-duplicated by word, keeping the
+        first example sentence, summing counts and tagging each position with
+        source so word_occurrences can say which transcript a clip is in. Grammar
+        points whose title and examples are already held are dropped, and
+        grammar_counts are summed.
+
+        If this processor extracted a transcript itself, its own positions are
+        tagged with the source SELF_SOURCE on the first merge.
+
+        Returns:
+            int: Words that were new to the corpus
+        """
+        if not self.sources and any(o.segments for o in self.word_index.values()):
+            # Back-fill the processor's own positions so every position has a source
+            self.sources.append(SELF_SOURCE)
+            for occurrences in self.word_index.values():
+                occurrences.sources = array('i', [0]) * len(occurrences.segments)
+        code = len(self.sources)
+        self.sources.append(source)
+        self.dialogues.extend(other.dialogues)
+
+        new_words = 0
+        for item in other.vocabulary:
+            theirs = other.word_index.get(item.persian) or WordOccurrences(item)
+            ours = self.word_index.get(item.persian)
+            if ours is None:
+                self.vocabulary.append(item)
+                self.vocabulary_levels.setdefault(item.level, []).append(item)
+                ours = self.word_index[item.persian] = WordOccurrences(item)
+                new_words += 1
+            ours.count += theirs.count
+            ours.segments.extend(theirs.segments)
+            ours.timestamps.extend(theirs.timestamps)
+            ours.sources.extend(array('i', [code]) * len(theirs.segments))
+
+        if self.grammar_points and not self._grammar_keys:
+            # Merging into a processor that extracted a transcript itself
+            self._grammar_keys = {self._grammar_key(point) for point in self.grammar_points}
+        for point in other.grammar_points:
+            key = self._grammar_key(point)
+            if key not in self._grammar_keys:
+                self._grammar_keys.add(key)
+                self.grammar_points.append(point)
+        for name, count in other.grammar_counts.items():
+            self.grammar_counts[name] = self.grammar_counts.get(name, 0) + count
+        return new_words
+
     def get_grammar_points(self, level: Optional[str] = None) -> List[GrammarPoint]:
         """Get grammar points, optionally filtered by level"""
         if level:
@@ -395,42 +757,164 @@ class StructuredDataProcessor:
         # For now, return beginner
         return "beginner"
 
-    def export_data(self, filepath: str):
-        """Export structured data to JSON"""
+    def _metadata(self) -> Dict:
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'total_dialogues': len(self.dialogues),
+            'total_vocabulary': len(self.vocabulary),
+            'total_grammar_points': len(self.grammar_points)
+        }
+
+    def export_data(self, filepath: str, compress: bool = False):
+        """Export structured data to JSON, or to the columnar format for .npz paths
+
+        The columnar format stores turns, vocabulary, word positions and grammar
+        points as numpy columns with dictionary-encoded strings, so it is much
+        smaller than JSON and each section can be loaded on its own. compress
+        zips the columns as well, trading load time for size.
+        """
+        if filepath.endswith('.npz'):
+            self._export_columns(filepath, compress)
+            return
+
         data = {
             'dialogues': [[vars(turn) for turn in dialogue] for dialogue in self.dialogues],
             'vocabulary': [vars(item) for item in self.vocabulary],
             'grammar_points': [vars(point) for point in self.grammar_points],
-            'metadata': {
-                'timestamp': datetime.now().isoformat(),
-                'total_dialogues': len(self.dialogues),
-                'total_vocabulary': len(self.vocabulary),
-                'total_grammar_points': len(self.grammar_points)
-            }
+            'word_index': {
+                word: {'count': o.count, 'segments': o.segments.tolist(), 'timestamps': o.timestamps.tolist(),
+                       'sources': o.sources.tolist()}
+                for word, o in self.word_index.items()
+            },
+            'sources': self.sources,
+            'metadata': self._metadata()
         }
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
-    def import_data(self, filepath: str):
-        """Import structured data from JSON"""
+    def _export_columns(self, filepath: str, compress: bool):
+        turns = [turn for dialogue in self.dialogues for turn in dialogue]
+        columns = {
+            'dialogues.lengths': np.array([len(dialogue) for dialogue in self.dialogues], dtype='int32'),
+            'turns.timestamp': np.array([turn.timestamp for turn in turns], dtype='float64'),
+            **string_column('turns.speaker', (turn.speaker for turn in turns)),
+            **string_column('turns.text', (turn.text for turn in turns)),
+            **string_column('turns.translation', (turn.translation for turn in turns)),
+            **string_column('turns.notes', (turn.notes for turn in turns)),
+            **json_column('metadata', self._metadata())
+        }
+
+        for name in ('persian', 'english', 'transliteration', 'pos', 'example', 'level'):
+            columns.update(string_column(f'vocabulary.{name}', (getattr(item, name) for item in self.vocabulary)))
+        # Word positions as one flat array per field, sliced by per-word offsets
+        occurrences = [self.word_index.get(item.persian) or WordOccurrences(item) for item in self.vocabulary]
+        positions = np.zeros(len(occurrences) + 1, dtype='int64')
+        np.cumsum([len(o.segments) for o in occurrences], out=positions[1:])
+        columns['vocabulary.count'] = np.array([o.count for o in occurrences], dtype='int64')
+        columns['vocabulary.positions'] = positions
+        columns['vocabulary.segments'] = np.array([s for o in occurrences for s in o.segments], dtype='int64')
+        columns['vocabulary.timestamps'] = np.array([t for o in occurrences for t in o.timestamps], dtype='float64')
+        columns['vocabulary.sources'] = np.array([s for o in occurrences for s in o.sources], dtype='int32')
+        columns.update(json_column('sources', self.sources))
+
+        for name in ('title', 'explanation', 'level'):
+            values = (getattr(point, name) for point in self.grammar_points)
+            columns.update(string_column(f'grammar_points.{name}', values))
+        # Examples are nested, so they go in as one JSON list that loads in a single parse
+        columns.update(json_column('grammar_points.examples', [point.examples for point in self.grammar_points]))
+        write_columns(filepath, columns, compress)
+
+    def import_data(self, filepath: str, sections: Optional[Iterable[str]] = None):
+        """Import structured data from JSON or a columnar .npz export
+
+        sections limits the import to some of 'dialogues', 'vocabulary' and
+        'grammar_points'; the others are left as they are. From a columnar export
+        only the requested sections are read from disk.
+        """
+        sections = set(sections or EXPORT_SECTIONS)
+        if is_columnar_file(filepath):
+            with open_columns(filepath) as columns:
+                self._import_columns(columns, sections)
+            return
+
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
             
-        self.dialogues = [
-            [DialogueTurn(**turn) for turn in dialogue]
-            for dialogue in data.get('dialogues', [])
-        ]
+        if 'dialogues' in sections:
+            self.dialogues = [
+                [DialogueTurn(**turn) for turn in dialogue]
+                for dialogue in data.get('dialogues', [])
+            ]
         
-        self.vocabulary = [
-            VocabularyItem(**item)
-            for item in data.get('vocabulary', [])
-        ]
+        if 'vocabulary' in sections:
+            self.vocabulary = [
+                VocabularyItem(**item)
+                for item in data.get('vocabulary', [])
+            ]
+            
+            # Exports from before the word index only restore the vocabulary itself
+            self.word_index = {}
+            items = {item.persian: item for item in self.vocabulary}
+            for word, stats in data.get('word_index', {}).items():
+                if word in items:
+                    self.word_index[word] = WordOccurrences(items[word], stats['count'], array('q', stats['segments']),
+                                                            array('d', stats['timestamps']),
+                                                            array('i', stats.get('sources', [])))
+            self.sources = data.get('sources', [])
+            self._index_vocabulary()
         
-        self.grammar_points = [
-            GrammarPoint(**point)
-            for point in data.get('grammar_points', [])
-        ]
+        if 'grammar_points' in sections:
+            self.grammar_points = [
+                GrammarPoint(**point)
+                for point in data.get('grammar_points', [])
+            ]
+            self._grammar_keys = {self._grammar_key(point) for point in self.grammar_points}
+
+    def _import_columns(self, columns, sections: set):
+        if 'dialogues' in sections:
+            turns = [
+                DialogueTurn(speaker=speaker, text=text, timestamp=timestamp, translation=translation, notes=notes)
+                for speaker, text, timestamp, translation, notes in zip(
+                    read_string_column(columns, 'turns.speaker'), read_string_column(columns, 'turns.text'),
+                    columns['turns.timestamp'].tolist(), read_string_column(columns, 'turns.translation'),
+                    read_string_column(columns, 'turns.notes'))
+            ]
+            self.dialogues = []
+            start = 0
+            for length in columns['dialogues.lengths'].tolist():
+                self.dialogues.append(turns[start:start + length])
+                start += length
+
+        if 'vocabulary' in sections:
+            fields = ('persian', 'english', 'transliteration', 'pos', 'example', 'level')
+            values = zip(*(read_string_column(columns, f'vocabulary.{name}') for name in fields))
+            self.vocabulary = [VocabularyItem(*row) for row in values]
+            counts = columns['vocabulary.count'].tolist()
+            positions = columns['vocabulary.positions'].tolist()
+            segments = columns['vocabulary.segments']
+            timestamps = columns['vocabulary.timestamps']
+            sources = columns['vocabulary.sources']
+            # Positions only carry sources when the export was a merged corpus
+            tagged = len(sources) == len(segments) > 0
+            self.word_index = {}
+            for i, item in enumerate(self.vocabulary):
+                start, end = positions[i], positions[i + 1]
+                self.word_index[item.persian] = WordOccurrences(
+                    item, counts[i], array('q', segments[start:end].tobytes()),
+                    array('d', timestamps[start:end].tobytes()), array('i', sources[start:end].tobytes() if tagged else b''))
+            self.sources = read_json_column(columns, 'sources')
+            self._index_vocabulary()
+
+        if 'grammar_points' in sections:
+            fields = ('title', 'explanation', 'level')
+            titles, explanations, levels = (read_string_column(columns, f'grammar_points.{name}') for name in fields)
+            examples = read_json_column(columns, 'grammar_points.examples')
+            self.grammar_points = [
+                GrammarPoint(title=title, explanation=explanation, examples=example, level=level)
+                for title, explanation, example, level in zip(titles, explanations, examples, levels)
+            ]
+            self._grammar_keys = {self._grammar_key(point) for point in self.grammar_points}
 
 if __name__ == "__main__":
     structurer = TranscriptStructurer()
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.fake_bedrock import FakeBedrockClient
+from backend.ingest_pipeline import IngestPipeline
+from backend.structured_data import TranscriptStructurer
+
+VIDEO_COUNT = 8
+
+class FakeDownloader:
+    """Returns canned transcripts after a delay, like TranscriptDownloader without the network"""
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+
+    def download_transcript(self, url, languages=None):
+        time.sleep(self.latency)
+        video_id = url.rsplit('=', 1)[-1]
+        if video_id == 'missing':
+            return {'error': 'No transcript found in specified languages'}
+        lines = ["問題2", f"مرد: ویدیو {video_id} ساعت هشت", "問題3", f"زن: رستوران {video_id}"]
+        return {
+            'video_info': {'video_id': video_id, 'title': video_id},
+            'transcript': [{'text': line, 'start': i, 'duration': 1} for i, line in enumerate(lines)],
+            'language': 'fa'
+        }
+
+class RecordingStore:
+    """Stands in for SimpleVectorStore and records what gets indexed"""
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.questions = {}
+        self._lock = threading.Lock()
+
+    def add_questions(self, section, questions, ids=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.questions.setdefault(section, []).extend(questions)
+        return len(questions)
+
+def test_ingest_pipeline():
+    client = FakeBedrockClient(latency=0.3)
+    structurer = TranscriptStructurer(bedrock_client=client, use_cache=False, cache_dir=tempfile.mkdtemp())
+    store = RecordingStore()
+    pipeline = IngestPipeline(FakeDownloader(), structurer, store, download_workers=2, structure_workers=4,
+                              queue_size=2)
+
+    urls = [f"https://www.youtube.com/watch?v=video{i}" for i in range(VIDEO_COUNT)]
+    urls.append("https://www.youtube.com/watch?v=missing")
+    print(f"Running {len(urls)} videos through the pipeline...")
+    result = pipeline.run(urls)
+    pipeline.print_metrics()
+
+    assert len(result['completed']) == VIDEO_COUNT
+    assert len(result['failed']) == 1 and result['failed'][0]['error'].startswith('download')
+    assert len(store.questions['section2']) == 2 * VIDEO_COUNT
+    assert all(set(item['timings']) == {'download', 'structure', 'parse', 'index'} for item in result['completed'])
+
+    # Stages overlap, so the run takes far less than the sum of the per-video work
+    sequential = sum(sum(item['timings'].values()) for item in result['completed'])
+    print(f"\nSequential work {sequential:.1f}s, pipeline wall time {result['metrics']['seconds']:.1f}s")
+    assert result['metrics']['seconds'] < sequential / 2
+
+    print("\nRunning again on the same pipeline...")
+    again = pipeline.run(urls[:2])
+    assert len(again['completed']) == 2
+
+def test_misbehaving_stage():
+    # One stage returns None and one crashes; neither may hang the run
+    pipeline = IngestPipeline(FakeDownloader(latency=0.0), structurer=object(), store=RecordingStore(latency=0.0))
+    pipeline.stages[1].func = lambda item: None if item['url'].endswith('video0') else item
+    pipeline.stages[2].func = lambda item: item['missing']
+    result = pipeline.run([f"https://www.youtube.com/watch?v=video{i}" for i in range(3)])
+
+    assert result['completed'] == []
+    errors = sorted(item['error'] for item in result['failed'])
+    print(f"Failures: {errors}")
+    assert errors[0].startswith('parse') and errors[1].startswith('parse')
+    assert errors[2] == "structure: returned NoneType instead of the item"
+    metrics = result['metrics']['stages']
+    assert metrics['structure']['processed'] == 3 and metrics['parse']['processed'] == 2
+
+if __name__ == "__main__":
+    try:
+        test_ingest_pipeline()
+        test_misbehaving_stage()
+        print("\nTest completed successfully!")
+    except Exception as e:
+        print(f"\nError during test: {str(e)}")
+        sys.exit(1)
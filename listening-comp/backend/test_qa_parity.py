@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.qa_backends import QA_BACKENDS, load_qa_pipeline
+
+QA_MODEL = "timpal0l/mdeberta-v3-base-squad2"
+
+# Fixed question/context pairs in the shape RAGSystem sends to the QA model
+QA_FIXTURES = [
+    {
+        "question": "زن کجا کار می‌کند؟",
+        "context": "مرد: شما کجا کار می‌کنید؟ زن: من در یک مکتب کار می‌کنم. مرد: چه درسی می‌دهید؟ زن: من ریاضی درس می‌دهم."
+    },
+    {
+        "question": "ساعت چند است؟",
+        "context": "مرد: ببخشید، ساعت چند است؟ زن: ساعت سه بعد از ظهر است. مرد: متشکرم."
+    },
+    {
+        "question": "How do you say hello in Persian?",
+        "context": "In Persian, hello is سلام (salaam). Goodbye is خداحافظ (khodaa-haafez). Thank you is ممنون (mamnoon)."
+    },
+    {
+        "question": "او چند سال دارد؟",
+        "context": "اسم من سارا است. من بیست و پنج سال دارم و در تهران زندگی می‌کنم. من دانشجو هستم."
+    },
+    {
+        "question": "قطار کی حرکت می‌کند؟",
+        "context": "مسافر: ببخشید، قطار مشهد کی حرکت می‌کند؟ مامور: قطار ساعت هشت صبح حرکت می‌کند. مسافر: بلیط چند است؟"
+    },
+    {
+        "question": "What does mamnoon mean?",
+        "context": "The word ممنون (mamnoon) means thank you. خیلی ممنون means thank you very much."
+    },
+    {
+        "question": "خانواده او چند نفر هستند؟",
+        "context": "خانواده من پنج نفر هستند: پدرم، مادرم، دو برادرم و من. ما در یک خانه بزرگ زندگی می‌کنیم."
+    },
+    {
+        "question": "آنها به کجا سفر می‌کنند؟",
+        "context": "ما تابستان به شیراز سفر می‌کنیم. در شیراز باغ ارم و حافظیه را می‌بینیم."
+    }
+]
+
+
+def answer_fixtures(qa_pipeline):
+    return [
+        qa_pipeline(question=f["question"], context=f["context"], max_answer_len=50)
+        for f in QA_FIXTURES
+    ]
+
+
+def check_parity(backend: str) -> bool:
+    """Check that an accelerated backend gives exactly the same answers as pytorch."""
+    print(f"Loading pytorch and {backend} pipelines...")
+    baseline = answer_fixtures(load_qa_pipeline(QA_MODEL, "pytorch"))
+    candidate = answer_fixtures(load_qa_pipeline(QA_MODEL, backend, fallback=False))
+
+    mismatches = 0
+    for fixture, expected, actual in zip(QA_FIXTURES, baseline, candidate):
+        same = expected["answer"] == actual["answer"]
+        mismatches += not same
+        print(f"{'✅' if same else '❌'} {fixture['question']}")
+        print(f"   pytorch: {expected['answer']} ({expected['score']:.3f})")
+        print(f"   {backend}: {actual['answer']} ({actual['score']:.3f})")
+
+    print(f"\n{backend}: {len(QA_FIXTURES) - mismatches}/{len(QA_FIXTURES)} exact answer matches")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    backends = sys.argv[1:] or [b for b in QA_BACKENDS if b != "pytorch"]
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = check_parity(backend)
+        except Exception as e:
+            print(f"\nError during {backend} parity test: {str(e)}")
+            results[backend] = False
+    sys.exit(0 if all(results.values()) else 1)
@@ -0,0 +1,200 @@
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.index_factory import INDEX_TYPES, IndexConfig
+from backend.lexical_index import BM25Index
+from backend.rag_system import RAGSystem
+
+DIM = 16
+
+class HashEncoder:
+    """Deterministic stand-in for the sentence transformer: one random vector per distinct text"""
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        return np.array([
+            np.random.default_rng(int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)).standard_normal(DIM)
+            for text in texts
+        ], dtype='float32').reshape(len(texts), DIM)
+
+class StubRAG(RAGSystem):
+    model = HashEncoder()
+
+def line_text(video_id: str, line: int) -> str:
+    return f"ویدیو {video_id} جمله {line}"
+
+def transcript(video_id: str, lines: int, language: str = 'fa', text=line_text) -> dict:
+    return {
+        'video_info': {'video_id': video_id, 'title': f"Title {video_id}"},
+        'language': language,
+        'transcript': [
+            {'text': text(video_id, i), 'start': 2.0 * i, 'duration': 2.0}
+            for i in range(lines)
+        ]
+    }
+
+def write_transcript(data_dir: str, video_id: str, lines: int, **kwargs):
+    with open(os.path.join(data_dir, f"{video_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(transcript(video_id, lines, **kwargs), f, ensure_ascii=False)
+
+def make_corpus(videos: int, lines: int) -> str:
+    data_dir = os.path.join(tempfile.mkdtemp(), "transcripts")
+    os.makedirs(data_dir)
+    for v in range(videos):
+        write_transcript(data_dir, f"v{v:03d}", lines)
+    return data_dir
+
+def make_rag(data_dir: str, index_type: str = 'flat', **kwargs) -> StubRAG:
+    config = IndexConfig(index_type, ann_threshold=0, pq_m=4)
+    return StubRAG(data_dir, embedding_size=DIM, index_config=config, retrieval_only=True,
+                   chunk_tokens=None, hybrid=False, **kwargs)
+
+def found(rag: RAGSystem, text: str, k: int = 10) -> bool:
+    return text in [r['text'] for r in rag.search(text, k=k)]
+
+def test_cache_reuse():
+    data_dir = make_corpus(3, 20)
+    make_rag(data_dir)
+
+    before = StubRAG.model.encoded
+    rag = make_rag(data_dir)
+    assert StubRAG.model.encoded == before, "An unchanged corpus should load from the cache"
+    assert not rag.cache.dirty
+    assert found(rag, line_text('v001', 5))
+
+    # Only the edited transcript is embedded again
+    write_transcript(data_dir, 'v001', 20, text=lambda video_id, i: f"ویدیو {video_id} جمله تازه {i}")
+    before = StubRAG.model.encoded
+    rag = make_rag(data_dir)
+    assert StubRAG.model.encoded - before == 20, f"Expected 20 re-embedded segments, got {StubRAG.model.encoded - before}"
+    assert found(rag, "ویدیو v001 جمله تازه 5") and not found(rag, line_text('v001', 5), k=60)
+
+    # A deleted transcript drops out of the index
+    os.remove(os.path.join(data_dir, "v002.json"))
+    rag = make_rag(data_dir)
+    assert rag.cache.keys() == ['v000', 'v001'] and len(rag.store) == 40
+    assert not any(r['metadata']['video_id'] == 'v002' for r in rag.search(line_text('v002', 5), k=40))
+
+    # Another segmenter invalidates every cached vector
+    before = StubRAG.model.encoded
+    StubRAG(data_dir, embedding_size=DIM, retrieval_only=True, chunk_tokens=64, hybrid=False)
+    assert StubRAG.model.encoded > before, "Chunked segments need new embeddings"
+    print("Index cache reused, and invalidated by edits, deletions and segmenter changes")
+
+def test_add_remove_round_trip():
+    # Enough segments to train IVF-PQ codebooks
+    data_dir = make_corpus(40, 260)
+    for index_type in INDEX_TYPES:
+        # A cache per index type, since removals are remembered in the cache
+        rag = make_rag(data_dir, index_type, cache_dir=tempfile.mkdtemp())
+        assert rag._index_kind[0] == index_type, f"Built {rag._index_kind[0]} instead of {index_type}"
+
+        removed = rag.remove_video('v000')
+        assert removed == 260, f"Expected 260 removed segments, got {removed}"
+        for video_id in ('v001', 'v020', 'v039'):
+            for line in (0, 130, 259):
+                results = rag.search(line_text(video_id, line), k=10)
+                assert all(r['metadata']['video_id'] != 'v000' for r in results), "Removed video came back"
+                assert found(rag, line_text(video_id, line)), f"{index_type}: lost {video_id}/{line} after removal"
+
+        added = rag.add_transcript(transcript('new', 30))
+        assert added == 30 and found(rag, line_text('new', 12)), f"{index_type}: added segment not found"
+        rag.remove_video('new')
+        assert not found(rag, line_text('new', 12)), f"{index_type}: removed segment still found"
+        rag.add_transcript(transcript('new', 30))
+        assert found(rag, line_text('new', 12)) and found(rag, line_text('v020', 7))
+        print(f"{index_type}: segments survive removals and re-added videos are found again")
+
+def test_removal_persists():
+    data_dir = make_corpus(3, 20)
+    rag = make_rag(data_dir)
+    assert rag.remove_video('v001') == 20
+    assert rag.sync_transcripts() == 0, "Sync should not bring a removed video back"
+    assert not found(rag, line_text('v001', 5), k=40)
+    rag = make_rag(data_dir)
+    assert len(rag.store) == 40 and not found(rag, line_text('v001', 5), k=40), "Removal should survive a restart"
+
+    with open(os.path.join(data_dir, "v001.json"), 'r', encoding='utf-8') as f:
+        assert rag.add_transcript(json.load(f), key='v001') == 20
+    assert found(make_rag(data_dir), line_text('v001', 5)), "add_transcript should bring the video back"
+    print("Removed videos stay removed until they are added again")
+
+def test_lexical_removal():
+    data_dir = make_corpus(3, 20)
+    write_transcript(data_dir, 'other', 20, text=lambda video_id, i: f"واژه‌ای دیگر {i}")
+    rag = make_rag(data_dir)
+    lexical = rag.lexical_index
+    rag.remove_video('other')
+    rag.remove_video('v001')
+
+    # The index now matches one built from the surviving segments alone
+    fresh = BM25Index()
+    for key in ('v000', 'v002'):
+        for row in rag._rows[key]:
+            fresh.add(int(row), rag.store.text(row))
+    assert lexical.postings == fresh.postings, "Removed rows should leave no postings behind"
+    assert 'دیگر' not in lexical.postings
+    assert lexical.doc_lengths == fresh.doc_lengths and lexical._total_length == fresh._total_length
+    assert lexical.search("جمله 5", k=5) == fresh.search("جمله 5", k=5)
+    print(f"BM25 index pruned to {len(lexical.postings)} terms over {len(lexical)} segments")
+
+def test_small_corpus_fallback():
+    # Far too few vectors to train PQ codebooks; the index falls back to IVF-Flat
+    rag = make_rag(make_corpus(3, 40), 'ivfpq')
+    assert rag._index_kind == ('ivf', 'float32'), f"Unexpected index kind {rag._index_kind}"
+    assert rag.search(line_text('v002', 7), k=1)[0]['text'] == line_text('v002', 7)
+
+    empty_dir = make_corpus(0, 0)
+    rag = make_rag(empty_dir, 'ivf')
+    assert rag._index_kind[0] == 'flat', "An empty index cannot be trained"
+    write_transcript(empty_dir, 'v000', 40)
+    assert rag.sync_transcripts() == 40
+    assert rag._index_kind[0] == 'ivf', "The first transcript should train the IVF index"
+    print(f"Small corpora fall back to {rag._index_kind}")
+
+def test_filters():
+    data_dir = make_corpus(4, 30)
+    write_transcript(data_dir, 'en1', 30, language='en')
+    for index_type in ('flat', 'ivf', 'hnsw'):
+        rag = make_rag(data_dir, index_type)
+        query = line_text('v000', 3)
+        for filters in ({'video_id': 'v002'}, {'language': 'en'}, {'start': 20.0, 'end': 30.0},
+                        {'video_id': 'v001', 'start': 50.0}):
+            results = rag.search(query, k=5, **filters)
+            assert results, f"{index_type}: no results for {filters}"
+            for r in results:
+                metadata = r['metadata']
+                assert filters.get('video_id', metadata['video_id']) == metadata['video_id']
+                assert filters.get('language', metadata['language']) == metadata['language']
+                assert metadata['start'] + metadata['duration'] > filters.get('start', -1.0)
+                assert metadata['start'] < filters.get('end', float('inf'))
+
+            # The filtered top k is the exact top k over the matching segments
+            if index_type == 'flat':
+                rows = rag.store.select(**filters)
+                vectors = np.vstack([rag.cache.load_vectors(key) for key in rag.cache.keys()])
+                distances = ((vectors[rows] - rag._encode([query])[0]) ** 2).sum(axis=1)
+                expected = [rag.store.text(int(rows[i])) for i in np.argsort(distances)[:5]]
+                assert [r['text'] for r in results] == expected, f"Filtered results differ for {filters}"
+        assert rag.search(query, k=5, video_id='missing') == []
+    print("Filtered searches only return matching segments, ranked as an exact search would")
+
+if __name__ == "__main__":
+    try:
+        test_cache_reuse()
+        test_removal_persists()
+        test_lexical_removal()
+        test_small_corpus_fallback()
+        test_filters()
+        test_add_remove_round_trip()
+        print("\nTest completed successfully!")
+    except Exception as e:
+        print(f"\nError during test: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,176 @@
+import sys
+import os
+import json
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.structured_corpus import process_corpus
+from backend.structured_data import StructuredDataProcessor, iter_jsonl_segments
+
+TEST_SEGMENTS = [
+    {'text': 'سلام، من مریم هستم.', 'start': 0.0, 'duration': 2.0},
+    {'text': 'از آشنایی با شما خوشوقتم.', 'start': 2.5, 'duration': 2.0},
+    # Five seconds of silence before the next dialogue
+    {'text': 'قطار ساعت هشت صبح حرکت می‌کند.', 'start': 9.5, 'duration': 3.0},
+    {'text': 'بلیت‌ها را از کجا بخرم؟', 'start': 13.0, 'duration': 2.0}
+]
+
+def generated_segments(n: int):
+    """Segments produced on demand, with a pause every tenth segment"""
+    start = 0.0
+    for i in range(n):
+        yield {'text': f"مرد: قطار ساعت هشت حرکت می‌کند {'پایان' if i % 10 == 9 else ''}", 'start': start, 'duration': 2.0}
+        start += 5.0 if i % 10 == 9 else 2.5
+
+def streaming_peak(n: int) -> int:
+    processor = StructuredDataProcessor()
+    tracemalloc.start()
+    dialogues = sum(1 for _ in processor.iter_dialogues(generated_segments(n)))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert dialogues == n // 10, f"Expected {n // 10} dialogues, got {dialogues}"
+    return peak
+
+def test_pause_breaks():
+    processor = StructuredDataProcessor()
+    stats = processor.process_transcript(TEST_SEGMENTS)
+    print(f"Processed: {stats}")
+    assert stats['dialogues'] == 2, "The long pause should split the transcript in two"
+    assert [len(d) for d in processor.dialogues] == [2, 2]
+
+def test_streaming_from_jsonl():
+    path = os.path.join(tempfile.mkdtemp(), "transcript.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for segment in TEST_SEGMENTS:
+            f.write(json.dumps(segment, ensure_ascii=False) + "\n")
+
+    processor = StructuredDataProcessor()
+    processor.process_transcript(TEST_SEGMENTS)
+    expected = processor.dialogues, processor.vocabulary, processor.grammar_points
+
+    streaming = StructuredDataProcessor()
+    dialogues = list(streaming.iter_dialogues(iter_jsonl_segments(path)))
+    assert (dialogues, streaming.vocabulary, streaming.grammar_points) == expected
+    print(f"Streamed {len(dialogues)} dialogues from {path}")
+
+def test_positions_off_by_default():
+    processor = StructuredDataProcessor()
+    processor.process_transcript(TEST_SEGMENTS)
+    assert processor.word_frequency('قطار') == 1
+    assert processor.word_occurrences('قطار') == [], "Positions are only filed on request"
+
+def test_word_index():
+    processor = StructuredDataProcessor()
+    processor.process_transcript(TEST_SEGMENTS + [{'text': 'قطار قطار رفت', 'start': 20.0, 'duration': 1.0}],
+                                 track_positions=True)
+
+    assert processor.word_frequency('قطار') == 3
+    assert processor.word_occurrences('قطار') == [{'segment': 2, 'timestamp': 9.5}, {'segment': 4, 'timestamp': 20.0}]
+    assert processor.word_occurrences('هواپیما') == []
+    assert processor.top_vocabulary(1)[0][0].persian == 'قطار'
+    assert processor.get_vocabulary('beginner') == processor.vocabulary
+    assert processor.get_vocabulary('advanced') == []
+    print(f"Most frequent: {[(item.persian, count) for item, count in processor.top_vocabulary(3)]}")
+
+    path = os.path.join(tempfile.mkdtemp(), "structured.json")
+    processor.export_data(path)
+    restored = StructuredDataProcessor()
+    restored.import_data(path)
+    assert restored.word_occurrences('قطار') == processor.word_occurrences('قطار')
+    assert restored.get_vocabulary('beginner') == processor.vocabulary
+
+def test_columnar_export():
+    processor = StructuredDataProcessor()
+    processor.process_transcript(TEST_SEGMENTS + [{'text': 'کتاب‌ها را می‌خرند', 'start': 20.0, 'duration': 1.0}],
+                                 track_positions=True)
+    processor.dialogues[0][0].notes = "Greeting"
+    directory = tempfile.mkdtemp()
+    json_path = os.path.join(directory, "structured.json")
+    npz_path = os.path.join(directory, "structured.npz")
+    processor.export_data(json_path)
+    processor.export_data(npz_path)
+    print(f"JSON export: {os.path.getsize(json_path)} bytes, columnar: {os.path.getsize(npz_path)} bytes")
+
+    restored = StructuredDataProcessor()
+    restored.import_data(npz_path)
+    assert restored.dialogues == processor.dialogues
+    assert restored.vocabulary == processor.vocabulary
+    assert restored.grammar_points == processor.grammar_points and restored.grammar_points
+    assert restored.word_occurrences('قطار') == processor.word_occurrences('قطار')
+
+    vocabulary_only = StructuredDataProcessor()
+    vocabulary_only.import_data(npz_path, sections=['vocabulary'])
+    assert vocabulary_only.vocabulary == processor.vocabulary
+    assert vocabulary_only.dialogues == [] and vocabulary_only.grammar_points == []
+
+def test_corpus():
+    data_dir = tempfile.mkdtemp()
+    shared = {'text': 'کتاب‌ها را می‌خرند', 'start': 30.0, 'duration': 1.0}
+    with open(os.path.join(data_dir, "video1.json"), 'w', encoding='utf-8') as f:
+        json.dump({'video_info': {'video_id': 'video1'}, 'transcript': TEST_SEGMENTS + [shared]}, f, ensure_ascii=False)
+    with open(os.path.join(data_dir, "video2.jsonl"), 'w', encoding='utf-8') as f:
+        for segment in [{'text': 'قطار رفت', 'start': 0.0, 'duration': 1.0}, shared]:
+            f.write(json.dumps(segment, ensure_ascii=False) + "\n")
+    with open(os.path.join(data_dir, "broken.json"), 'w', encoding='utf-8') as f:
+        f.write("{not json")
+    paths = [os.path.join(data_dir, name) for name in ("video1.json", "video2.jsonl", "broken.json")]
+
+    print("\nProcessing a corpus of three transcripts...")
+    corpus, reports = process_corpus(paths, workers=2)
+    for report in reports:
+        print(f"{report['source']}: {report['seconds']:.3f}s, new words {report.get('new_words')}, error {report['error']}")
+    assert [report['source'] for report in reports] == ['video1', 'video2', 'broken']
+    assert reports[2]['error'] and not reports[0]['error'] and not reports[1]['error']
+    assert reports[1]['new_words'] == 1, "Only 'رفت' is new in the second transcript"
+
+    words = [item.persian for item in corpus.vocabulary]
+    assert len(words) == len(set(words)), "Vocabulary should be de-duplicated across transcripts"
+    assert corpus.word_frequency('قطار') == 2
+    assert corpus.word_occurrences('قطار') == [
+        {'source': 'video1', 'segment': 2, 'timestamp': 9.5},
+        {'source': 'video2', 'segment': 0, 'timestamp': 0.0}
+    ]
+    titles = [point.title for point in corpus.grammar_points]
+    assert len(titles) == len(set(titles)), "The shared sentence's grammar points should be merged"
+    assert len(corpus.dialogues) == 5
+
+    path = os.path.join(data_dir, "corpus.npz")
+    corpus.export_data(path)
+    restored = StructuredDataProcessor()
+    restored.import_data(path, sections=['vocabulary'])
+    assert restored.word_occurrences('قطار') == corpus.word_occurrences('قطار')
+
+def test_merge_into_processed():
+    processor = StructuredDataProcessor()
+    processor.process_transcript(TEST_SEGMENTS, track_positions=True)
+    other = StructuredDataProcessor()
+    other.process_transcript([{'text': 'قطار رفت', 'start': 0.0, 'duration': 1.0}], track_positions=True)
+    processor.merge(other, 'other')
+
+    assert processor.word_frequency('قطار') == 2
+    assert processor.word_occurrences('قطار') == [
+        {'source': '<self>', 'segment': 2, 'timestamp': 9.5},
+        {'source': 'other', 'segment': 0, 'timestamp': 0.0}
+    ]
+
+def test_flat_memory():
+    small = streaming_peak(5000)
+    large = streaming_peak(50000)
+    print(f"Peak memory streaming 5k segments: {small / 1024:.0f} KiB, 50k segments: {large / 1024:.0f} KiB")
+    assert large < 2 * small, "Streaming memory should not grow with transcript length"
+
+if __name__ == "__main__":
+    try:
+        test_pause_breaks()
+        test_streaming_from_jsonl()
+        test_positions_off_by_default()
+        test_word_index()
+        test_columnar_export()
+        test_corpus()
+        test_merge_into_processed()
+        test_flat_memory()
+        print("\nTest completed successfully!")
+    except Exception as e:
+        print(f"\nError during test: {str(e)}")
+        sys.exit(1)
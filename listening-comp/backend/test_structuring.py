@@ -0,0 +1,194 @@
+import sys
+import os
+import time
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.batch_structure import structure_directory
+from backend.fake_bedrock import FakeBedrockClient
+from backend.structured_data import QUESTION_BLOCK, SECTIONS, TranscriptStructurer
+
+# Seconds each fake Bedrock call takes
+LATENCY = 0.5
+
+TEST_TRANSCRIPT = """問題2
+مرد: ببخشید، قطار مشهد کی حرکت می‌کند؟
+زن: قطار ساعت هشت صبح حرکت می‌کند.
+問題3
+شما در رستوران هستید و می‌خواهید صورت‌حساب را بخواهید.
+"""
+
+def structure_with(max_concurrency: int):
+    client = FakeBedrockClient(latency=LATENCY)
+    structurer = TranscriptStructurer(bedrock_client=client, max_concurrency=max_concurrency, use_cache=False,
+                                      cache_dir=tempfile.mkdtemp())
+    start = time.perf_counter()
+    sections = structurer.structure_transcript(TEST_TRANSCRIPT)
+    return sections, time.perf_counter() - start, client
+
+def test_concurrent_structuring():
+    print("Structuring with one Bedrock call at a time...")
+    sequential, sequential_time, _ = structure_with(1)
+    print(f"Sequential: {sequential_time:.2f}s")
+
+    print("\nStructuring with concurrent section calls...")
+    concurrent, concurrent_time, client = structure_with(4)
+    print(f"Concurrent: {concurrent_time:.2f}s (peak {client.peak_in_flight} calls in flight)")
+    print(f"Speedup: {sequential_time / concurrent_time:.1f}x")
+
+    assert list(concurrent) == list(SECTIONS), f"Sections out of order: {list(concurrent)}"
+    assert concurrent == sequential, "Concurrent results differ from sequential ones"
+    assert client.peak_in_flight == len(SECTIONS)
+    assert concurrent_time < sequential_time
+
+    print("\nSection 3 output:")
+    print(concurrent[3])
+
+def test_response_cache():
+    client = FakeBedrockClient(latency=LATENCY)
+    cache_dir = tempfile.mkdtemp()
+    structurer = TranscriptStructurer(bedrock_client=client, cache_dir=cache_dir)
+
+    print("\nStructuring twice with the response cache...")
+    first = structurer.structure_transcript(TEST_TRANSCRIPT)
+    start = time.perf_counter()
+    second = structurer.structure_transcript(TEST_TRANSCRIPT)
+    print(f"Repeat run: {time.perf_counter() - start:.3f}s, {len(client.calls)} Bedrock calls in total")
+    assert second == first
+    assert len(client.calls) == len(SECTIONS), "Repeat run should not call Bedrock"
+
+    # A new structurer over the same directory reads the cache from disk
+    reopened = TranscriptStructurer(bedrock_client=client, cache_dir=cache_dir)
+    assert reopened.structure_transcript(TEST_TRANSCRIPT) == first
+    assert len(client.calls) == len(SECTIONS)
+
+    print("Bypassing the cache...")
+    reopened.structure_transcript(TEST_TRANSCRIPT, use_cache=False)
+    assert len(client.calls) == 2 * len(SECTIONS), "Bypass should call Bedrock again"
+
+    print("Changing the transcript...")
+    reopened.structure_transcript(TEST_TRANSCRIPT + "\nزن: خداحافظ")
+    assert len(client.calls) == 3 * len(SECTIONS), "A different transcript must not hit the cache"
+
+    print("Evicting down to a small size limit...")
+    small = TranscriptStructurer(bedrock_client=client, cache_dir=tempfile.mkdtemp(), cache_max_bytes=600)
+    for i in range(5):
+        small.structure_transcript(f"{TEST_TRANSCRIPT}\n{i}")
+    stats = small.response_cache.stats()
+    print(f"Cache after eviction: {stats}")
+    assert stats['bytes'] <= 600
+
+def test_chunked_structuring():
+    # 問題2 long enough to need several overlapping chunks at a 200-token budget
+    lines = ["問題2"] + [f"مرد: جمله شماره {i} درباره ساعت حرکت قطار" for i in range(120)] + ["問題3", "شما در رستوران هستید."]
+    transcript = "\n".join(lines)
+    client = FakeBedrockClient(latency=0.05, questions_per_call=1000)
+    structurer = TranscriptStructurer(bedrock_client=client, use_cache=False, cache_dir=tempfile.mkdtemp(),
+                                      chunk_tokens=200, chunk_overlap=40)
+
+    print("\nStructuring a long transcript in chunks...")
+    sections = structurer.structure_transcript(transcript)
+    calls_per_section = len(client.calls) // len(SECTIONS)
+    blocks = QUESTION_BLOCK.findall(sections[2])
+    print(f"{calls_per_section} chunks per section, {client.peak_in_flight} calls in flight at peak, "
+          f"{len(blocks)} unique questions for {len(lines)} lines")
+    assert calls_per_section > 1
+    # The fake turns every line into a question, so overlaps only show up as duplicates
+    assert len(blocks) == len(set(lines))
+    assert blocks[1].count("جمله شماره 0 ") == 3, "Questions should keep transcript order"
+
+class NoSection3Client(FakeBedrockClient):
+    def converse(self, **kwargs):
+        response = super().converse(**kwargs)
+        if '問題3' in kwargs['messages'][0]['content'][0]['text'].split("Here's the transcript:")[0]:
+            response['output']['message']['content'][0]['text'] = ""
+        return response
+
+def test_missing_section():
+    data_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    write_transcript(data_dir, "video0", ["問題2", "مرد: ویدیو", "問題3", "زن: پایان"])
+
+    def run(client, force=False):
+        structurer = TranscriptStructurer(bedrock_client=client, use_cache=False, cache_dir=tempfile.mkdtemp())
+        return structure_directory(data_dir, output_dir, structurer, workers=1, force=force)
+
+    print("\nStructuring a transcript whose section 3 has no questions...")
+    stats = run(FakeBedrockClient(latency=0.01))
+    assert stats['structured'] == 1 and os.path.exists(os.path.join(output_dir, "video0_section3.txt"))
+
+    run(NoSection3Client(latency=0.01), force=True)
+    assert not os.path.exists(os.path.join(output_dir, "video0_section3.txt")), "Stale section file should be removed"
+
+    client = NoSection3Client(latency=0.01)
+    stats = run(client)
+    assert stats['skipped'] == 1 and not client.calls, "A transcript without section 3 should be skipped"
+
+class MalformedBedrockClient(FakeBedrockClient):
+    def converse(self, **kwargs):
+        super().converse(**kwargs)
+        return {'output': {}}
+
+def test_malformed_response():
+    client = MalformedBedrockClient(latency=0.01)
+    structurer = TranscriptStructurer(bedrock_client=client, use_cache=False, cache_dir=tempfile.mkdtemp(),
+                                      backoff_base=1.0)
+    print("\nStructuring with malformed Bedrock responses...")
+    start = time.perf_counter()
+    sections = structurer.structure_transcript(TEST_TRANSCRIPT)
+    assert sections == {} and structurer.retry_count == 0, "Malformed responses should not be retried"
+    assert len(client.calls) == len(SECTIONS) and time.perf_counter() - start < 1.0
+
+def write_transcript(data_dir: str, video_id: str, lines):
+    data = {
+        'video_info': {'video_id': video_id, 'title': video_id},
+        'transcript': [{'text': line, 'start': i, 'duration': 1} for i, line in enumerate(lines)],
+        'language': 'fa'
+    }
+    with open(os.path.join(data_dir, f"{video_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+def test_batch_structuring():
+    data_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    for i in range(6):
+        write_transcript(data_dir, f"video{i}", ["問題2", f"مرد: ویدیو {i}", "問題3", f"زن: پایان {i}"])
+
+    def run(client, **kwargs):
+        structurer = TranscriptStructurer(bedrock_client=client, use_cache=False, cache_dir=tempfile.mkdtemp(),
+                                          backoff_base=0.01)
+        return structure_directory(data_dir, output_dir, structurer, workers=3, **kwargs)
+
+    print("\nBatch structuring with throttling and one failing transcript...")
+    client = FakeBedrockClient(latency=0.05, throttle_first=3, fail_on="ویدیو 4")
+    stats = run(client)
+    assert stats['structured'] == 5 and stats['failed'] == 1 and stats['retries'] == 3
+    assert not os.path.exists(os.path.join(output_dir, "video4_section2.txt"))
+
+    print("\nResuming after the failure...")
+    client = FakeBedrockClient(latency=0.05)
+    stats = run(client)
+    assert stats['structured'] == 1 and stats['skipped'] == 5
+    assert len(client.calls) == len(SECTIONS), "Only the failed transcript should be structured again"
+
+    print("\nRe-running after one transcript changed...")
+    write_transcript(data_dir, "video2", ["問題2", "مرد: نسخه جدید", "問題3", "زن: پایان"])
+    client = FakeBedrockClient(latency=0.05)
+    stats = run(client)
+    assert stats['structured'] == 1 and stats['skipped'] == 5
+    with open(os.path.join(output_dir, "video2_section2.txt"), encoding='utf-8') as f:
+        assert "نسخه جدید" in f.read()
+
+if __name__ == "__main__":
+    try:
+        test_concurrent_structuring()
+        test_response_cache()
+        test_chunked_structuring()
+        test_batch_structuring()
+        test_malformed_response()
+        test_missing_section()
+        print("\nTest completed successfully!")
+    except Exception as e:
+        print(f"\nError during test: {str(e)}")
+        sys.exit(1)
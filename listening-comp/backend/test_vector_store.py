@@ -0,0 +1,127 @@
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.vector_store import SimpleVectorStore, question_text
+
+DIM = 16
+
+class HashEncoder:
+    """Deterministic stand-in for the sentence transformer: one random vector per distinct text"""
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        return np.array([
+            np.random.default_rng(int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)).standard_normal(DIM)
+            for text in texts
+        ], dtype='float32').reshape(len(texts), DIM)
+
+class StubStore(SimpleVectorStore):
+    model = HashEncoder()
+
+def make_question(i: int) -> dict:
+    return {
+        'Introduction': f"گفتگو شماره {i}",
+        'Conversation': f"مرد: بلیت قطار شماره {i} کجاست؟ زن: روی میز است.",
+        'Question': f"بلیت شماره {i} کجاست؟",
+        'Options': ["روی میز", "در کیف", "در جیب", "در ماشین"]
+    }
+
+def make_store(directory: str = None) -> StubStore:
+    return StubStore(directory or tempfile.mkdtemp(), embedding_size=DIM)
+
+def write_questions_file(path: str, questions):
+    with open(path, 'w', encoding='utf-8') as f:
+        for question in questions:
+            f.write("<question>\n")
+            for field in ('Introduction', 'Conversation', 'Question'):
+                f.write(f"{field}:\n{question[field]}\n")
+            f.write("Options:\n" + "".join(f"{n}. {option}\n" for n, option in enumerate(question['Options'], 1)))
+            f.write("</question>\n\n")
+
+def test_dedup():
+    store = make_store()
+    questions = [make_question(i) for i in range(5)]
+    assert store.add_questions("section2", questions + [make_question(2)]) == 5, "A repeat within the batch is skipped"
+    assert store.add_questions("section2", [make_question(4), make_question(5)]) == 1, "Only the new question is added"
+    assert store.add_questions("section3", [make_question(4)]) == 1, "Sections are deduplicated separately"
+    assert len(store.collections["section2"]["ids"]) == 6
+    assert store.get_question_by_id("section2", "q6") == make_question(5)
+
+    # Same content with other spacing and punctuation is a repeat
+    respaced = dict(make_question(1), Question="  بلیت شماره 1   کجاست ؟")
+    assert store.add_questions("section2", [respaced]) == 0
+
+    # Generated ids step past ids given by callers instead of dropping the question
+    assert store.add_questions("section2", [make_question(6)], ids=["q8"]) == 1
+    assert store.add_questions("section2", [make_question(7), make_question(8)]) == 2
+    assert store.get_question_by_id("section2", "q9") == make_question(7)
+    assert store.get_question_by_id("section2", "q10") == make_question(8)
+    assert store.add_questions("section2", [make_question(9)], ids=["q8"]) == 0, "A taken explicit id is skipped"
+    print(f"Deduplicated to {len(store.collections['section2']['ids'])} questions")
+
+def test_search_and_persistence():
+    directory = tempfile.mkdtemp()
+    store = make_store(directory)
+    store.add_questions("section2", [make_question(i) for i in range(20)])
+    query = question_text(make_question(7))
+    assert store.search_questions("section2", query, n_results=1) == [make_question(7)]
+    assert len(store.search_questions("section2", query, n_results=50)) == 20
+    assert store.search_questions("section3", query) == []
+
+    before = StubStore.model.encoded
+    reloaded = make_store(directory)
+    assert StubStore.model.encoded == before, "Stored vectors should be read back, not re-embedded"
+    assert reloaded.search_questions("section2", query, n_results=3) == store.search_questions("section2", query, n_results=3)
+    assert reloaded.add_questions("section2", [make_question(7)]) == 0, "Dedup should survive a reload"
+    print("Questions and vectors survive a reload")
+
+def test_index_directory():
+    questions_dir = tempfile.mkdtemp()
+    write_questions_file(os.path.join(questions_dir, "video1_section2.txt"), [make_question(i) for i in range(3)])
+    write_questions_file(os.path.join(questions_dir, "video2_section2.txt"), [make_question(i) for i in range(2, 5)])
+    write_questions_file(os.path.join(questions_dir, "video1_section3.txt"), [make_question(10)])
+
+    store = make_store()
+    added = store.index_directory(questions_dir, workers=1)
+    assert added == {'section2': 5, 'section3': 1}, f"Unexpected counts {added}"
+    assert store.search_questions("section3", question_text(make_question(10)), n_results=1) == [make_question(10)]
+    assert store.index_directory(questions_dir, workers=1) == {'section2': 0, 'section3': 0}
+
+def test_legacy_conversion():
+    directory = tempfile.mkdtemp()
+    questions = [make_question(i) for i in range(3)]
+    with open(os.path.join(directory, "section2.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': make_store().model_name,
+            'embeddings': HashEncoder().encode([question_text(q) for q in questions]).tolist(),
+            'metadata': questions,
+            'documents': [str(q) for q in questions],
+            'ids': ['q1', 'q2', 'q3']
+        }, f, ensure_ascii=False)
+
+    store = make_store(directory)
+    assert store.collections["section2"]["ids"] == ['q1', 'q2', 'q3']
+    assert store.search_questions("section2", question_text(questions[1]), n_results=1) == [questions[1]]
+    assert os.path.exists(os.path.join(directory, "section2", "vectors.f32"))
+    assert not os.path.exists(os.path.join(directory, "section2.json")), "The JSON store should be set aside"
+    assert os.path.exists(os.path.join(directory, "section2.json.migrated"))
+    assert make_store(directory).get_question_by_id("section2", "q3") == questions[2]
+    print("Converted a JSON collection to the binary layout")
+
+if __name__ == "__main__":
+    try:
+        test_dedup()
+        test_search_and_persistence()
+        test_index_directory()
+        test_legacy_conversion()
+        print("\nTest completed successfully!")
+    except Exception as e:
+        print(f"\nError during test: {str(e)}")
+        sys.exit(1)
@@ -1,153 +1,375 @@
 import numpy as np
 import json
 import os
-from typing import Dict, List, Optional
+import re
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from backend.persian_text import normalize_persian
+
+# Question files written by the question generator, e.g. sY7L5cfCWno_section2.txt
+SECTION_FILE_PATTERN = re.compile(r'_section(\d+)\.txt$')
+
+# Question fields that describe what a question is about, in reading order
+QUESTION_FIELDS = ('Introduction', 'Conversation', 'Situation', 'Question')
+
+
+def question_text(question: Dict) -> str:
+    """Text of a parsed question that gets embedded"""
+    return "\n".join(question[field] for field in QUESTION_FIELDS if question.get(field))
+
+
+def question_hash(question: Dict) -> str:
+    """Hash of a parsed question's normalized content, independent of its id, spacing and punctuation"""
+    normalized = {
+        field: [normalize_persian(str(v)) for v in value] if isinstance(value, list) else normalize_persian(str(value))
+        for field, value in question.items()
+    }
+    canonical = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting the whole array"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype='int64')
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def parse_questions_file(filename: str) -> List[Dict]:
+    """Parse questions from a structured text file"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return parse_questions_text(f.read())
+    except Exception as e:
+        print(f"Error parsing questions from {filename}: {str(e)}")
+        return []
+
+
+def parse_questions_text(text: str) -> List[Dict]:
+    """Parse questions from structured text, as written by TranscriptStructurer"""
+    questions = []
+    current_question = {}
+    lines = text.splitlines()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+
+        if line.startswith('<question>'):
+            current_question = {}
+        elif line.startswith('Introduction:'):
+            i += 1
+            if i < len(lines):
+                current_question['Introduction'] = lines[i].strip()
+        elif line.startswith('Conversation:'):
+            i += 1
+            if i < len(lines):
+                current_question['Conversation'] = lines[i].strip()
+        elif line.startswith('Situation:'):
+            i += 1
+            if i < len(lines):
+                current_question['Situation'] = lines[i].strip()
+        elif line.startswith('Question:'):
+            i += 1
+            if i < len(lines):
+                current_question['Question'] = lines[i].strip()
+        elif line.startswith('Options:'):
+            options = []
+            for _ in range(4):
+                i += 1
+                if i < len(lines):
+                    option = lines[i].strip()
+                    if option.startswith('1.') or option.startswith('2.') or option.startswith('3.') or option.startswith('4.'):
+                        options.append(option[2:].strip())
+            current_question['Options'] = options
+        elif line.startswith('</question>'):
+            if current_question:
+                questions.append(current_question)
+                current_question = {}
+        i += 1
+    return questions
+
 
 class SimpleVectorStore:
-    def __init__(self, persist_directory: str = "backend/data/vectorstore"):
+    def __init__(self, persist_directory: str = "backend/data/vectorstore",
+                 model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 embedding_size: int = 384):
         """Initialize a simple vector store for JLPT listening questions"""
         self.persist_directory = persist_directory
+        self.model_name = model_name
+        self.embedding_size = embedding_size
+        self._model = None
         self.collections = {}
         self.load_or_create_collections()
     
+    @property
+    def model(self):
+        """Sentence transformer, loaded on first access"""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as unit-length float32 rows, so a dot product is the cosine similarity"""
+        if not texts:
+            return np.zeros((0, self.embedding_size), dtype='float32')
+        vectors = np.asarray(self.model.encode(texts), dtype='float32')
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.ascontiguousarray(vectors / np.maximum(norms, 1e-12))
+    
+    def _empty_collection(self) -> Dict:
+        # "embeddings" is memory-mapped from vectors.f32 on first search; "rows"
+        # (id -> row) and "hashes" (question content) are rebuilt on load
+        return {
+            "embeddings": None,
+            "metadata": [],
+            "documents": [],
+            "ids": [],
+            "rows": {},
+            "hashes": set()
+        }
+    
+    def _index_lookups(self, collection: Dict):
+        """Rebuild the id and content-hash lookups of a loaded collection"""
+        collection["rows"] = {question_id: row for row, question_id in enumerate(collection["ids"])}
+        collection["hashes"] = {question_hash(question) for question in collection["metadata"]}
+    
+    def _section_dir(self, section: str) -> str:
+        return os.path.join(self.persist_directory, section)
+    
+    def _vectors_path(self, section: str) -> str:
+        return os.path.join(self._section_dir(section), "vectors.f32")
+    
+    def _records_path(self, section: str) -> str:
+        return os.path.join(self._section_dir(section), "records.jsonl")
+    
+    def _manifest_path(self) -> str:
+        return os.path.join(self.persist_directory, "manifest.json")
+    
+    def _read_records(self, section: str) -> Dict:
+        """Read one section's JSON Lines records, stopping at a torn last line"""
+        collection = self._empty_collection()
+        path = self._records_path(section)
+        if not os.path.exists(path):
+            return collection
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Ignoring incomplete record at the end of {path}")
+                    break
+                collection["ids"].append(record["id"])
+                collection["metadata"].append(record["metadata"])
+                collection["documents"].append(record["document"])
+        return collection
+    
+    def _embeddings(self, section: str) -> np.ndarray:
+        """The section's (n, embedding_size) matrix, memory-mapped on first use"""
+        collection = self.collections[section]
+        if collection["embeddings"] is None:
+            n = len(collection["ids"])
+            path = self._vectors_path(section)
+            if n == 0 or not os.path.exists(path):
+                collection["embeddings"] = np.zeros((0, self.embedding_size), dtype='float32')
+            else:
+                collection["embeddings"] = np.memmap(path, dtype='float32', mode='r', shape=(n, self.embedding_size))
+        return collection["embeddings"]
+    
+    def _append(self, section: str, embeddings: np.ndarray, records: List[Dict]):
+        """Append vectors and records to a section's files without rewriting them"""
+        os.makedirs(self._section_dir(section), exist_ok=True)
+        # Vectors first: on a crash in between, rows beyond the last record are ignored
+        with open(self._vectors_path(section), 'ab') as f:
+            f.write(np.ascontiguousarray(embeddings, dtype='float32').tobytes())
+        with open(self._records_path(section), 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
     def load_or_create_collections(self):
         """Create or load collections from disk"""
         os.makedirs(self.persist_directory, exist_ok=True)
         
         # Initialize empty collections if they don't exist
         self.collections = {
-            "section2": {
-                "embeddings": [],
-                "metadata": [],
-                "documents": [],
-                "ids": []
-            },
-            "section3": {
-                "embeddings": [],
-                "metadata": [],
-                "documents": [],
-                "ids": []
-            }
+            "section2": self._empty_collection(),
+            "section3": self._empty_collection()
         }
+        for name in sorted(os.listdir(self.persist_directory)):
+            if os.path.isdir(self._section_dir(name)):
+                self.collections.setdefault(name, self._empty_collection())
+        
+        manifest = {}
+        if os.path.exists(self._manifest_path()):
+            try:
+                with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                print(f"Error loading vector store manifest: {str(e)}")
+        same_model = (manifest.get("model_name") == self.model_name
+                      and manifest.get("embedding_size") == self.embedding_size)
         
         # Try to load existing data
+        rewrite = not same_model
+        migrated = {}
         for section in self.collections:
-            file_path = os.path.join(self.persist_directory, f"{section}.json")
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+            try:
+                if os.path.exists(self._records_path(section)):
+                    collection = self._read_records(section)
+                    # Rows past the last complete record come from an interrupted append
+                    vector_rows = 0
+                    if os.path.exists(self._vectors_path(section)):
+                        vector_rows = os.path.getsize(self._vectors_path(section)) // (4 * self.embedding_size)
+                    if vector_rows != len(collection["ids"]):
+                        rewrite = True
+                        del collection["ids"][vector_rows:], collection["metadata"][vector_rows:], collection["documents"][vector_rows:]
+                    self._index_lookups(collection)
+                    self.collections[section] = collection
+                    if not same_model:
+                        print(f"Re-embedding collection {section} with {self.model_name}")
+                        collection["embeddings"] = self._encode([question_text(q) for q in collection["metadata"]])
+                else:
+                    # Collections from before the binary layout: one JSON file per section
+                    file_path = os.path.join(self.persist_directory, f"{section}.json")
+                    if os.path.exists(file_path):
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                        print(f"Converting collection {section} to the binary layout")
+                        if data.get("model_name") == self.model_name:
+                            embeddings = np.asarray(data["embeddings"], dtype='float32').reshape(-1, self.embedding_size)
+                        else:
+                            embeddings = self._encode([question_text(q) for q in data["metadata"]])
+                        data["embeddings"] = np.ascontiguousarray(embeddings)
+                        data.pop("model_name", None)
+                        self._index_lookups(data)
                         self.collections[section] = data
-                except Exception as e:
-                    print(f"Error loading collection {section}: {str(e)}")
+                        migrated[section] = file_path
+                        rewrite = True
+            except Exception as e:
+                print(f"Error loading collection {section}: {str(e)}")
+        
+        if rewrite:
+            self.save_collections()
+        
+        # Set converted JSON files aside so they are neither read again nor mistaken for the live store
+        for section, file_path in migrated.items():
+            if os.path.exists(self._records_path(section)):
+                os.replace(file_path, file_path + ".migrated")
+                print(f"Converted {file_path}; the old file is kept as {file_path}.migrated")
 
     def save_collections(self):
-        """Save collections to disk"""
-        for section, data in self.collections.items():
-            file_path = os.path.join(self.persist_directory, f"{section}.json")
+        """Rewrite every collection's files from memory (adds append instead)"""
+        for section in self.collections:
+            collection = self.collections[section]
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                embeddings = np.array(self._embeddings(section), dtype='float32')
+                records = [
+                    {"id": question_id, "metadata": metadata, "document": document}
+                    for question_id, metadata, document in zip(collection["ids"], collection["metadata"], collection["documents"])
+                ]
+                # Release the memory map before replacing the file underneath it
+                collection["embeddings"] = embeddings
+                for path in (self._vectors_path(section), self._records_path(section)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._append(section, embeddings, records)
             except Exception as e:
                 print(f"Error saving collection {section}: {str(e)}")
+        
+        with open(self._manifest_path(), 'w', encoding='utf-8') as f:
+            json.dump({"model_name": self.model_name, "embedding_size": self.embedding_size}, f)
 
-    def add_questions(self, section: str, questions: List[Dict], ids: Optional[List[str]] = None):
-        """Add questions to the vector store"""
+    def _new_questions(self, section: str, questions: List[Dict],
+                       ids: Optional[List[str]] = None) -> List[Tuple[str, Dict, str]]:
+        """(id, question, content hash) for each question the section does not hold yet
+
+        Questions are matched on their normalized content. Generated ids skip any id
+        already in use; a caller-given id that is taken skips its question.
+        """
         if section not in self.collections:
-            self.collections[section] = {
-                "embeddings": [],
-                "metadata": [],
-                "documents": [],
-                "ids": []
-            }
-        
-        # For testing, just use random vectors as embeddings
+            self.collections[section] = self._empty_collection()
+        collection = self.collections[section]
+        
+        new = []
+        batch_ids = set()
+        batch_hashes = set()
         for i, question in enumerate(questions):
-            # Create a random embedding vector (this is just for testing)
-            embedding = np.random.rand(384).tolist()  # Using 384 dimensions
-            
-            # Generate an ID if not provided
-            question_id = ids[i] if ids and i < len(ids) else f"q{len(self.collections[section]['ids']) + 1}"
-            
-            self.collections[section]["embeddings"].append(embedding)
-            self.collections[section]["metadata"].append(question)
-            self.collections[section]["documents"].append(str(question))
-            self.collections[section]["ids"].append(question_id)
-        
-        self.save_collections()
+            digest = question_hash(question)
+            if digest in collection["hashes"] or digest in batch_hashes:
+                continue
+            if ids and i < len(ids):
+                question_id = ids[i]
+                if question_id in collection["rows"] or question_id in batch_ids:
+                    print(f"Skipping question {question_id} in {section}: id already in use")
+                    continue
+            else:
+                # Generate an ID if not provided
+                number = len(collection["ids"]) + len(new) + 1
+                while f"q{number}" in collection["rows"] or f"q{number}" in batch_ids:
+                    number += 1
+                question_id = f"q{number}"
+            new.append((question_id, question, digest))
+            batch_ids.add(question_id)
+            batch_hashes.add(digest)
+        return new
+    
+    def _insert(self, section: str, new: List[Tuple[str, Dict, str]], embeddings: np.ndarray):
+        """Register new questions in memory and append them to the section's files"""
+        collection = self.collections[section]
+        records = []
+        for question_id, question, digest in new:
+            collection["rows"][question_id] = len(collection["ids"])
+            collection["hashes"].add(digest)
+            collection["metadata"].append(question)
+            collection["documents"].append(str(question))
+            collection["ids"].append(question_id)
+            records.append({"id": question_id, "metadata": question, "document": str(question)})
+        
+        try:
+            self._append(section, embeddings, records)
+        except Exception as e:
+            print(f"Error saving collection {section}: {str(e)}")
+        # Re-map on the next search so the new rows are included
+        collection["embeddings"] = None
+    
+    def add_questions(self, section: str, questions: List[Dict], ids: Optional[List[str]] = None) -> int:
+        """Add questions to the vector store, skipping ones it already holds; returns how many were added"""
+        new = self._new_questions(section, questions, ids)
+        if new:
+            # One encoder pass for the whole batch
+            embeddings = self._encode([question_text(question) for _, question, _ in new])
+            self._insert(section, new, embeddings)
+        return len(new)
 
     def search_questions(self, section: str, query: str, n_results: int = 5) -> List[Dict]:
-        """Search for similar questions (simplified version)"""
+        """Return the n_results questions most similar to the query, best first"""
         if section not in self.collections or not self.collections[section]["metadata"]:
             return []
         
-        # For testing, just return random questions
-        metadata = self.collections[section]["metadata"]
-        n = min(n_results, len(metadata))
-        indices = np.random.choice(len(metadata), n, replace=False)
-        
-        return [metadata[i] for i in indices]
+        collection = self.collections[section]
+        scores = self._embeddings(section) @ self._encode([query])[0]
+        return [collection["metadata"][i] for i in top_k(scores, n_results)]
 
     def get_question_by_id(self, section: str, question_id: str) -> Optional[Dict]:
         """Get a question by its ID"""
         if section not in self.collections:
             return None
         
-        try:
-            idx = self.collections[section]["ids"].index(question_id)
-            return self.collections[section]["metadata"][idx]
-        except ValueError:
+        row = self.collections[section]["rows"].get(question_id)
+        if row is None:
             return None
+        return self.collections[section]["metadata"][row]
 
     def parse_questions_from_file(self, filename: str) -> List[Dict]:
         """Parse questions from a structured text file"""
-        questions = []
-        current_question = {}
-        
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                if line.startswith('<question>'):
-                    current_question = {}
-                elif line.startswith('Introduction:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Introduction'] = lines[i].strip()
-                elif line.startswith('Conversation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Conversation'] = lines[i].strip()
-                elif line.startswith('Situation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Situation'] = lines[i].strip()
-                elif line.startswith('Question:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Question'] = lines[i].strip()
-                elif line.startswith('Options:'):
-                    options = []
-                    for _ in range(4):
-                        i += 1
-                        if i < len(lines):
-                            option = lines[i].strip()
-                            if option.startswith('1.') or option.startswith('2.') or option.startswith('3.') or option.startswith('4.'):
-                                options.append(option[2:].strip())
-                    current_question['Options'] = options
-                elif line.startswith('</question>'):
-                    if current_question:
-                        questions.append(current_question)
-                        current_question = {}
-                i += 1
-            return questions
-        except Exception as e:
-            print(f"Error parsing questions from {filename}: {str(e)}")
-            return []
+        return parse_questions_file(filename)
 
     def index_questions_file(self, filename: str, section_num: int):
         """Index all questions from a file into the vector store"""
@@ -159,8 +381,40 @@ class SimpleVectorStore:
         
         # Add to vector store
         if questions:
-            self.add_questions(f"section{section_num}", questions)
-            print(f"Indexed {len(questions)} questions from {filename}")
+            added = self.add_questions(f"section{section_num}", questions)
+            print(f"Indexed {added} new of {len(questions)} questions from {filename}")
+
+    def index_directory(self, directory: str = "backend/data/questions", workers: Optional[int] = None) -> Dict[str, int]:
+        """Index every *_sectionN.txt file in a directory with one encoder pass and one append per section
+        
+        Files are parsed in a process pool. Returns the number of new questions per section.
+        """
+        paths = [
+            os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if SECTION_FILE_PATTERN.search(filename)
+        ]
+        if len(paths) > 1 and workers != 1:
+            with ProcessPoolExecutor(workers) as pool:
+                parsed = list(pool.map(parse_questions_file, paths))
+        else:
+            parsed = [parse_questions_file(path) for path in paths]
+        
+        by_section: Dict[str, List[Dict]] = {}
+        for path, questions in zip(paths, parsed):
+            section = f"section{SECTION_FILE_PATTERN.search(path).group(1)}"
+            by_section.setdefault(section, []).extend(questions)
+        
+        new = {section: self._new_questions(section, questions) for section, questions in by_section.items()}
+        embeddings = self._encode([question_text(question) for items in new.values() for _, question, _ in items])
+        offset = 0
+        for section, items in new.items():
+            if items:
+                self._insert(section, items, embeddings[offset:offset + len(items)])
+                offset += len(items)
+        
+        added = {section: len(items) for section, items in new.items()}
+        print(f"Indexed {sum(added.values())} new questions from {len(paths)} files")
+        return added
 
 if __name__ == "__main__":
     # Example usage
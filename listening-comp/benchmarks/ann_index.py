@@ -0,0 +1,87 @@
+"""Recall and latency of the RAG index types on synthetic segment embeddings.
+
+Runs offline: vectors are drawn from a Gaussian mixture shaped like sentence
+embeddings, so no model or transcripts are needed.
+
+    python benchmarks/ann_index.py --sizes 10000 100000 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.index_factory import ENCODINGS, INDEX_TYPES, IndexConfig, build_index
+
+
+def synthetic_embeddings(n: int, dim: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, roughly like sentence embeddings of related captions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype('float32')
+    labels = rng.integers(0, n_clusters, n)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_queries(vectors: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of indexed vectors, so each query has real near neighbours."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), n_queries)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype('float32')
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def bench(n: int, dim: int, n_queries: int, k: int, pq_m: int, encoding: str):
+    vectors = synthetic_embeddings(n, dim)
+    queries = synthetic_queries(vectors, n_queries)
+    truth = None
+
+    print(f"\n{n:,} segments, {n_queries} queries, k={k}")
+    print(f"{'index':<8}{'build s':>10}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for index_type in INDEX_TYPES:
+        config = IndexConfig(index_type, ann_threshold=0, pq_m=pq_m, encoding=encoding)
+        start = time.perf_counter()
+        index = build_index(dim, vectors, config=config)
+        build_time = time.perf_counter() - start
+
+        _, found = index.search(queries, k)
+        if truth is None:
+            truth = found
+        recall = recall_at_k(found, truth)
+
+        latencies = []
+        for i in range(n_queries):
+            start = time.perf_counter()
+            index.search(queries[i:i + 1], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p99 = np.percentile(latencies, [50, 99])
+
+        print(f"{index_type:<8}{build_time:>10.2f}{recall:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+        del index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--pq-m', type=int, default=48, help="PQ sub-quantizers for ivfpq")
+    parser.add_argument('--encoding', choices=ENCODINGS, default='float32', help="Vector encoding for flat/ivf/hnsw")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        bench(n, args.dim, args.queries, args.k, args.pq_m, args.encoding)
+
+
+if __name__ == "__main__":
+    main()
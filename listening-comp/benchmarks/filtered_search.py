@@ -0,0 +1,91 @@
+"""Latency of metadata-filtered search against global search on synthetic segments.
+
+Segments are spread over many videos; a filtered query searches one video through
+an ID selector inside the index scan, a post-filtered query takes a global top-k
+large enough to still hold k hits from that video.
+
+    python benchmarks/filtered_search.py --segments 100000 --videos 500
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.index_factory import INDEX_TYPES, IndexConfig, build_index, filtered_search_params
+from backend.segment_store import SegmentStore
+from benchmarks.ann_index import synthetic_embeddings, synthetic_queries
+
+
+def synthetic_store(n: int, n_videos: int) -> SegmentStore:
+    """Store with n segments split evenly over n_videos consecutive videos."""
+    store = SegmentStore(n)
+    per_video = max(1, n // n_videos)
+    for video in range(n_videos):
+        count = per_video if video < n_videos - 1 else n - per_video * (n_videos - 1)
+        store.append([
+            {'text': '', 'metadata': {'video_id': f'v{video}', 'title': '', 'language': 'fa',
+                                      'start': float(i), 'duration': 1.0}}
+            for i in range(count)
+        ])
+    return store
+
+
+def percentiles(search, queries: np.ndarray) -> tuple:
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        search(queries[i:i + 1])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return tuple(np.percentile(latencies, [50, 99]))
+
+
+def bench(n: int, n_videos: int, dim: int, n_queries: int, k: int, pq_m: int):
+    vectors = synthetic_embeddings(n, dim)
+    queries = synthetic_queries(vectors, n_queries)
+    store = synthetic_store(n, n_videos)
+    rows = store.select(video_id=f'v{n_videos // 2}')
+    # Enough global hits that k of them are likely to fall in the selected video
+    post_k = min(n, k * n_videos)
+
+    print(f"\n{n:,} segments, {n_videos} videos ({len(rows)} in the filtered one), {n_queries} queries, k={k}")
+    print(f"{'index':<8}{'global p50':>12}{'global p99':>12}{'filter p50':>12}{'filter p99':>12}"
+          f"{'post p50':>10}{'post p99':>10}")
+    for index_type in INDEX_TYPES:
+        config = IndexConfig(index_type, ann_threshold=0, pq_m=pq_m)
+        index = build_index(dim, vectors, config=config)
+
+        global_p = percentiles(lambda q: index.search(q, k), queries)
+        filter_p = percentiles(
+            lambda q: index.search(q, k, params=filtered_search_params(config, index_type, rows)), queries)
+
+        allowed = set(rows.tolist())
+
+        def post_filter(q):
+            _, found = index.search(q, post_k)
+            return [row for row in found[0] if row in allowed][:k]
+        post_p = percentiles(post_filter, queries)
+
+        print(f"{index_type:<8}{global_p[0]:>12.3f}{global_p[1]:>12.3f}{filter_p[0]:>12.3f}{filter_p[1]:>12.3f}"
+              f"{post_p[0]:>10.3f}{post_p[1]:>10.3f}")
+        del index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, nargs='+', default=[100000])
+    parser.add_argument('--videos', type=int, default=500)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--pq-m', type=int, default=48, help="PQ sub-quantizers for ivfpq")
+    args = parser.parse_args()
+
+    for n in args.segments:
+        bench(n, args.videos, args.dim, args.queries, args.k, args.pq_m)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-query latency of the QA model on each CPU backend.
+
+Uses the fixed fixtures from backend/test_qa_parity.py; run that first to
+confirm the accelerated backends give the same answers.
+
+    python benchmarks/qa_latency.py --repeats 5
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.qa_backends import QA_BACKENDS, load_qa_pipeline
+from backend.test_qa_parity import QA_FIXTURES, QA_MODEL
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', choices=QA_BACKENDS, default=list(QA_BACKENDS))
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'backend':<14}{'load s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        qa_pipeline = load_qa_pipeline(QA_MODEL, backend, fallback=False)
+        load_time = time.perf_counter() - start
+
+        # One untimed pass so lazy initialization does not count as latency
+        qa_pipeline(question=QA_FIXTURES[0]["question"], context=QA_FIXTURES[0]["context"])
+
+        latencies = []
+        for _ in range(args.repeats):
+            for fixture in QA_FIXTURES:
+                start = time.perf_counter()
+                qa_pipeline(question=fixture["question"], context=fixture["context"], max_answer_len=50)
+                latencies.append((time.perf_counter() - start) * 1000)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{backend:<14}{load_time:>10.1f}{p50:>10.1f}{p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
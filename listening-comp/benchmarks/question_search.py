@@ -0,0 +1,73 @@
+"""Latency of SimpleVectorStore similarity search on synthetic question embeddings.
+
+Runs offline: the section matrix is filled with clustered unit vectors, so only
+scoring and top-k selection are timed, not the query encoder. The list-of-lists
+baseline scores rows one by one, the way embeddings stored as JSON lists would be.
+
+    python benchmarks/question_search.py --sizes 10000 100000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.vector_store import top_k
+from benchmarks.ann_index import synthetic_embeddings, synthetic_queries
+
+
+def timed(search, queries: np.ndarray) -> tuple:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return tuple(np.percentile(latencies, [50, 99]))
+
+
+def bench(n: int, dim: int, n_queries: int, k: int, baseline_queries: int):
+    matrix = synthetic_embeddings(n, dim)
+    queries = synthetic_queries(matrix, n_queries)
+
+    print(f"\n{n:,} questions, {n_queries} queries, k={k}")
+    print(f"{'method':<22}{'p50 ms':>10}{'p99 ms':>10}")
+
+    p50, p99 = timed(lambda q: top_k(matrix @ q, k), queries)
+    print(f"{'matmul + argpartition':<22}{p50:>10.3f}{p99:>10.3f}")
+
+    p50, p99 = timed(lambda q: np.argsort(-(matrix @ q))[:k], queries)
+    print(f"{'matmul + argsort':<22}{p50:>10.3f}{p99:>10.3f}")
+
+    if baseline_queries:
+        rows = matrix.tolist()
+
+        def python_loop(q):
+            q = q.tolist()
+            scores = [sum(a * b for a, b in zip(row, q)) for row in rows]
+            return sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:k]
+        p50, p99 = timed(python_loop, queries[:baseline_queries])
+        print(f"{'python lists':<22}{p50:>10.3f}{p99:>10.3f}")
+
+    # The fast path must return the same top-k as a full sort
+    for q in queries[:10]:
+        scores = matrix @ q
+        assert list(top_k(scores, k)) == list(np.argsort(-scores, kind='stable')[:k])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--baseline-queries', type=int, default=3, help="Queries for the slow list baseline, 0 skips it")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        bench(n, args.dim, args.queries, args.k, args.baseline_queries)
+
+
+if __name__ == "__main__":
+    main()
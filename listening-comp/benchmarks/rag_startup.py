@@ -0,0 +1,57 @@
+"""Cold-start time and peak resident memory of RAGSystem, eager vs lazy models.
+
+Each mode runs in a fresh interpreter so imports and memory are not shared.
+Build the index cache once (any run does) before comparing.
+
+    python benchmarks/rag_startup.py --data-dir backend/data/transcripts
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from backend.rag_system import RAGSystem
+rag = RAGSystem(data_dir={data_dir!r}, retrieval_only={retrieval_only})
+if {eager}:
+    rag.model
+    rag.qa_pipeline
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+MODES = {
+    'eager': {'eager': True, 'retrieval_only': False},
+    'lazy': {'eager': False, 'retrieval_only': False},
+    'retrieval-only': {'eager': True, 'retrieval_only': True},
+}
+
+
+def run(data_dir: str, eager: bool, retrieval_only: bool) -> dict:
+    code = CHILD.format(root=ROOT, data_dir=data_dir, eager=eager, retrieval_only=retrieval_only)
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default="backend/data/transcripts")
+    args = parser.parse_args()
+
+    # Populate the index cache so every mode measures a warm restart
+    run(args.data_dir, eager=False, retrieval_only=True)
+
+    print(f"{'mode':<16}{'startup s':>12}{'peak RSS MB':>14}")
+    for mode, options in MODES.items():
+        result = run(args.data_dir, **options)
+        print(f"{mode:<16}{result['seconds']:>12.2f}{result['max_rss_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
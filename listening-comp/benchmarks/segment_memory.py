@@ -0,0 +1,91 @@
+"""Bytes per segment for the RAG segment store and index encodings.
+
+Compares the old list-of-dicts segment storage with SegmentStore, and the
+serialized size of a flat index per vector for each encoding. Runs offline on
+synthetic captions.
+
+    python benchmarks/segment_memory.py --segments 100000
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+import numpy as np
+import faiss
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.index_factory import ENCODINGS, IndexConfig, build_index
+from backend.segment_store import SegmentStore
+
+WORDS = ['سلام', 'خوب', 'هستم', 'ممنون', 'امروز', 'کجا', 'می‌روید', 'ساعت', 'چند', 'است', 'خانه', 'مدرسه']
+
+
+def synthetic_segments(n: int, per_video: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    segments = []
+    for i in range(n):
+        video = i // per_video
+        text = " ".join(rng.choice(WORDS, rng.integers(3, 9)))
+        segments.append({
+            'text': text,
+            'metadata': {
+                'video_id': f"video{video:07d}",
+                'title': f"درس فارسی شماره {video}",
+                'start': i * 2.5,
+                'duration': 2.5
+            }
+        })
+    return segments
+
+
+def measure(build) -> int:
+    """Bytes allocated by build() that are still alive afterwards."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def build_lists(segments):
+    # Copies strings and dicts the way the old load_transcripts did
+    texts, metadata = [], []
+    for segment in segments:
+        texts.append("".join(segment['text']))
+        metadata.append({key: (value if not isinstance(value, str) else "".join(value))
+                         for key, value in segment['metadata'].items()})
+    return texts, metadata
+
+
+def build_store(segments):
+    store = SegmentStore()
+    store.append(segments)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=384)
+    args = parser.parse_args()
+
+    segments = synthetic_segments(args.segments)
+    n = len(segments)
+
+    print(f"{n:,} segments")
+    print(f"{'segment storage':<24}{'bytes/segment':>16}")
+    print(f"{'lists of dicts':<24}{measure(lambda: build_lists(segments)) / n:>16.1f}")
+    print(f"{'SegmentStore':<24}{measure(lambda: build_store(segments)) / n:>16.1f}")
+
+    vectors = np.random.default_rng(1).standard_normal((n, args.dim)).astype('float32')
+    print(f"\n{'flat index encoding':<24}{'bytes/vector':>16}")
+    for encoding in ENCODINGS:
+        index = build_index(args.dim, vectors, config=IndexConfig('flat', encoding=encoding))
+        print(f"{encoding:<24}{len(faiss.serialize_index(index)) / n:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare export size and load time of the JSON and columnar structured data formats.
+
+A synthetic transcript is processed once, exported as pretty-printed JSON, as
+columnar .npz and as compressed .npz, and each file is loaded back in full and
+for the vocabulary section alone.
+
+    python benchmarks/structured_export.py --segments 10000
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.structured_data import StructuredDataProcessor
+from benchmarks.structured_extraction import best_of, synthetic_transcript
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    processor = StructuredDataProcessor()
+    processor.process_transcript(synthetic_transcript(args.segments), track_positions=True)
+    print(f"{args.segments:,} segments: {len(processor.dialogues)} dialogues, {len(processor.vocabulary)} words, "
+          f"{len(processor.grammar_points)} grammar points")
+
+    directory = tempfile.mkdtemp()
+    formats = [
+        ('json', os.path.join(directory, "structured.json"), False),
+        ('npz', os.path.join(directory, "structured.npz"), False),
+        ('npz compressed', os.path.join(directory, "structured_compressed.npz"), True)
+    ]
+    print(f"\n{'format':<16}{'size KiB':>10}{'export ms':>11}{'load ms':>10}{'vocab ms':>10}")
+    for name, path, compress in formats:
+        export_time = best_of(args.repeats, lambda: processor.export_data(path, compress=compress))
+        loaded = StructuredDataProcessor()
+        load_time = best_of(args.repeats, lambda: loaded.import_data(path))
+        assert loaded.dialogues == processor.dialogues and loaded.vocabulary == processor.vocabulary
+        assert loaded.grammar_points == processor.grammar_points
+        vocab_time = best_of(args.repeats, lambda: StructuredDataProcessor().import_data(path, sections=['vocabulary']))
+        print(f"{name:<16}{os.path.getsize(path) / 1024:>10.0f}{export_time * 1000:>11.1f}"
+              f"{load_time * 1000:>10.1f}{vocab_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
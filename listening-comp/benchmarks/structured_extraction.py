@@ -0,0 +1,134 @@
+"""Time StructuredDataProcessor.process_transcript on a synthetic long transcript.
+
+The reference is the earlier three-pass extractor (dialogues, then vocabulary,
+then grammar, with patterns compiled on the fly); both must produce identical
+dialogues, vocabulary and grammar points. process_transcript is timed as
+called by default and with track_positions=True, which also files word positions.
+
+    python benchmarks/structured_extraction.py --segments 10000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.structured_data import DialogueTurn, GrammarPoint, StructuredDataProcessor, VocabularyItem
+
+WORDS = [
+    'سلام', 'من', 'می‌خواهم', 'کتاب', 'خانه', 'رفتند', 'گفتند', 'خواهم', 'دوستانم', 'ها', 'کتاب‌ها',
+    'ساعت', 'هشت', 'صبح', 'قطار', 'حرکت', 'می‌کند', 'مدرسه', 'دانشجو', 'هستم', 'خب', 'حالا', 'پس',
+    'رستوران', 'غذا', 'خوردند', 'شهر', 'تهران', 'زندگی', 'کارم', 'کتابت', 'برادرش'
+]
+
+PERSIAN_DIGITS = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+
+
+def synthetic_transcript(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    for i in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 12))]
+        # A sprinkle of rare words so the vocabulary keeps growing
+        words.append(f"واژه{rng.randint(0, n)}".translate(PERSIAN_DIGITS))
+        duration = rng.uniform(1.0, 4.0)
+        segments.append({'text': " ".join(words), 'start': round(start, 2), 'duration': round(duration, 2)})
+        start += duration + rng.uniform(0.0, 3.0)
+    return segments
+
+
+def three_pass_reference(transcript_data):
+    """The extractor before the single-pass rewrite, kept for timing and parity."""
+    dialogues, vocabulary, grammar_points = [], [], []
+
+    def is_break(entry, next_entry):
+        current_end = float(entry.get('start', 0)) + float(entry.get('duration', 0))
+        next_start = float(next_entry['start']) if next_entry else current_end
+        if next_start - current_end > 2:
+            return True
+        text = str(entry.get('text', '')).lower()
+        topic_change_markers = ['خب', 'حالا', 'بنابراین', 'پس', 'در نتیجه']
+        return any(marker in text for marker in topic_change_markers)
+
+    # Pauses are measured to the next segment, as in the streaming extractor
+    current = []
+    for i, entry in enumerate(transcript_data):
+        text = entry.get('text', '')
+        if not text:
+            continue
+        current.append(DialogueTurn(speaker="Speaker", text=text, timestamp=float(entry.get('start', 0.0)),
+                                    translation=entry.get('translation', None)))
+        next_entry = transcript_data[i + 1] if i + 1 < len(transcript_data) else None
+        if is_break(entry, next_entry) and current:
+            dialogues.append(current)
+            current = []
+    if current:
+        dialogues.append(current)
+
+    seen_words = set()
+    for entry in transcript_data:
+        text = str(entry.get('text', ''))
+        for word in re.findall(r'[؀-ۿ]+', text):
+            if word not in seen_words:
+                vocabulary.append(VocabularyItem(persian=word, english="", transliteration="", pos="",
+                                                 example=text, level="beginner"))
+                seen_words.add(word)
+
+    patterns = {
+        'present_tense': r'می‌?[خ|ر|گ|ش|ن]',
+        'past_tense': r'[خ|ر|گ|ش|ن]د$',
+        'future_tense': r'خواه',
+        'plural': r'ها$',
+        'possession': r'[م|ت|ش|مان|تان|شان]$'
+    }
+    for entry in transcript_data:
+        text = str(entry.get('text', ''))
+        for pattern_name, pattern in patterns.items():
+            if re.search(pattern, text):
+                grammar_points.append(GrammarPoint(
+                    title=f"{pattern_name} usage", explanation=f"Example of {pattern_name} in Persian",
+                    examples=[{'persian': text, 'english': str(entry.get('translation', '')), 'transliteration': ''}],
+                    level="beginner"))
+    return dialogues, vocabulary, grammar_points
+
+
+def best_of(repeats: int, func):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.segments)
+    processor = StructuredDataProcessor()
+
+    reference = best_of(args.repeats, lambda: three_pass_reference(transcript))
+    positions = best_of(args.repeats, lambda: processor.process_transcript(transcript, track_positions=True))
+    current = best_of(args.repeats, lambda: processor.process_transcript(transcript))
+
+    dialogues, vocabulary, grammar_points = three_pass_reference(transcript)
+    assert processor.dialogues == dialogues, "Dialogues differ from the reference"
+    assert processor.vocabulary == vocabulary, "Vocabulary differs from the reference"
+    assert processor.grammar_points == grammar_points, "Grammar points differ from the reference"
+
+    print(f"{args.segments:,} segments: {len(dialogues)} dialogues, {len(vocabulary)} words, "
+          f"{len(grammar_points)} grammar hits")
+    print(f"{'three-pass reference':<22}{reference * 1000:>10.1f} ms")
+    print(f"{'default':<22}{current * 1000:>10.1f} ms  ({reference / current:.2f}x)")
+    print(f"{'with word positions':<22}{positions * 1000:>10.1f} ms  ({reference / positions:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
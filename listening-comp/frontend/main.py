@@ -128,6 +128,7 @@ if 'transcript_downloader' not in st.session_state:
 if 'rag_system' not in st.session_state:
     try:
         st.session_state.rag_system = RAGSystem()
+        st.session_state.rag_system.start_warm_up()
         print("RAGSystem initialized")
     except Exception as e:
         print("Error initializing RAGSystem:", str(e))
@@ -282,6 +283,13 @@ Video ID: {video_id}
 Error Details: {result['error']}
                         """)
                 else:
+                    # Make the new transcript searchable without rebuilding the RAG index
+                    if 'rag_system' in st.session_state:
+                        try:
+                            st.session_state.rag_system.add_transcript(result)
+                        except Exception as e:
+                            print("Error adding transcript to RAGSystem:", str(e))
+                    
                     # Display video info
                     video_info = result['video_info']
                     st.markdown("### Video Information")
@@ -379,7 +387,8 @@ def render_structured_data():
             
             # Process the transcript
             with st.spinner("Processing transcript..."):
-                stats = st.session_state.structured_processor.process_transcript(transcript_data)
+                # Word positions feed the "Heard at" line of the vocabulary tab
+                stats = st.session_state.structured_processor.process_transcript(transcript_data, track_positions=True)
                 
                 if 'error' in stats:
                     st.error(f"Error processing transcript: {stats['error']}")
@@ -432,6 +441,10 @@ def render_structured_data():
                         st.markdown(f"**Part of Speech:** {item.pos}")
                         st.markdown(f"**Example:** {item.example}")
                         st.markdown(f"**Level:** {item.level}")
+                        st.markdown(f"**Frequency:** {st.session_state.structured_processor.word_frequency(item.persian)}")
+                        occurrences = st.session_state.structured_processor.word_occurrences(item.persian)
+                        if occurrences:
+                            st.markdown("**Heard at:** " + ", ".join(f"{o['timestamp']:.1f}s" for o in occurrences[:10]))
             
             with tab3:
                 st.subheader("🔤 Grammar Points")
@@ -537,7 +550,10 @@ def render_rag_implementation():
                     if result['response']['answer']:
                         st.markdown("**Answer:**")
                         st.markdown(result['response']['answer'])
-                        st.markdown(f"**Confidence:** {result['response']['confidence']:.2%}")
+                        if result['response'].get('source') == 'lexical':
+                            st.markdown(f"**Matched segment** (BM25 score {result['response']['score']:.2f})")
+                        else:
+                            st.markdown(f"**Confidence:** {result['response']['confidence']:.2%}")
                     else:
                         st.warning("Could not generate a response")
                     